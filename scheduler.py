@@ -0,0 +1,182 @@
+import argparse
+import cProfile
+import contextlib
+import json
+import os
+import pstats
+import sys
+from scheduler_common import *
+from scheduler_tracefile import write_trace_index
+from scheduler_rm import rm_priority, rm_preempts
+from scheduler_edf import edf_priority, edf_preempts
+from scheduler_eerm import eerm_priority, eerm_preempts
+from scheduler_eeedf import (eeedf_priority, eeedf_preempts, static_frequency_selector,
+                             solve_static_frequencies)
+
+# (policy name, frequency strategy or None) -> (priority, preempts)
+POLICIES = {}
+# frequency strategy name -> (select_freq, pad_to_horizon, per_config)
+FREQUENCY_STRATEGIES = {}
+# strategies that only run with policies registered for them explicitly
+RESTRICTED_STRATEGIES = set()
+
+def register_policy(name, priority, preempts, strategy=None):
+    # a registration for a specific strategy overrides the generic one for it
+    POLICIES[(name, strategy)] = (priority, preempts)
+
+def register_frequency_strategy(name, select_freq, pad_to_horizon=True, per_config=False,
+                                restricted=False):
+    # per_config strategies are factories: select_freq(config) returns the callback;
+    # restricted ones need register_policy(..., strategy=name) for every policy
+    FREQUENCY_STRATEGIES[name] = (select_freq, pad_to_horizon, per_config)
+    if restricted:
+        RESTRICTED_STRATEGIES.add(name)
+
+register_policy("RM", rm_priority, rm_preempts)
+register_policy("EDF", edf_priority, edf_preempts)
+# the EE scripts break priority ties by task order only; keep their traces
+register_policy("RM", eerm_priority, eerm_preempts, strategy="EE")
+register_policy("EDF", eeedf_priority, eeedf_preempts, strategy="EE")
+
+register_frequency_strategy("MAX", max_frequency_index, pad_to_horizon=True)
+register_frequency_strategy("EE", select_frequency_index_ee, pad_to_horizon=False)
+# offline assignment under the EDF utilization bound, so EDF only
+register_frequency_strategy("STATIC", static_frequency_selector, pad_to_horizon=False,
+                            per_config=True, restricted=True)
+register_policy("EDF", edf_priority, edf_preempts, strategy="STATIC")
+
+def get_policy(name, strategy="MAX"):
+    if strategy not in FREQUENCY_STRATEGIES:
+        raise ValueError(f"unknown frequency strategy {strategy!r}")
+    p = POLICIES.get((name, strategy))
+    if p is None:
+        p = POLICIES.get((name, None))
+        if p is None:
+            raise ValueError(f"unknown policy {name!r}")
+        if strategy in RESTRICTED_STRATEGIES:
+            raise ValueError(f"frequency strategy {strategy!r} is not available for policy {name!r}")
+    return p
+
+def make_scheduler(name, strategy="MAX"):
+    # schedule_*-style callable for a registered policy/strategy pair
+    priority, preempts = get_policy(name, strategy)
+    select_freq, pad_to_horizon, per_config = FREQUENCY_STRATEGIES[strategy]
+
+    def schedule(config, jobs=None, coalesce=False, probe=None, metrics_only=False,
+                 procrastinate=0):
+        sel = select_freq(config) if per_config else select_freq
+        return simulate(config, jobs, priority, preempts, sel, pad_to_horizon, coalesce,
+                        probe=probe, metrics_only=metrics_only, procrastinate=procrastinate)
+    return schedule
+
+def algorithm_name(name, strategy="MAX"):
+    return name if strategy == "MAX" else f"{strategy} {name}"
+
+def run_policies(config, specs, coalesce=False, probes=None, metrics_only=False, delays=None):
+    # several (policy, strategy) runs over one parsed config; the job set is
+    # generated once and reset by the engine before every run. Metrics-only runs
+    # release the jobs lazily instead, so memory does not grow with the horizon,
+    # and without a probe or procrastination they go through simulate_cycles.
+    # probes: one Probe (or None) per spec; delays: one procrastination delay per spec
+    jobs = None if metrics_only else generate_jobs(config)
+    probes = [None] * len(specs) if probes is None else probes
+    delays = [0] * len(specs) if delays is None else delays
+    schedules = []
+    for (name, strategy), probe, delay in zip(specs, probes, delays):
+        schedule_fn = make_scheduler(name, strategy)
+        if metrics_only and probe is None and not delay:
+            schedules.append(simulate_cycles(config, schedule_fn)[4])
+        else:
+            schedules.append(schedule_fn(config, jobs, coalesce, probe, metrics_only, delay))
+    return schedules
+
+def safe_procrastination(config, name, strategy="MAX"):
+    # procrastination_delay for the frequencies a strategy can run the tasks at;
+    # EE picks per job, so every task is assumed at its slowest
+    if strategy == "MAX":
+        freqs = 0
+    elif strategy == "STATIC":
+        freqs = solve_static_frequencies(config)
+    else:
+        freqs = [max(range(len(t.wcet)), key=t.wcet.__getitem__)
+                 for t in config.tasks[:config.num_tasks]]
+    return procrastination_delay(config, freqs, name)
+
+def delay_arg(text):
+    if text == "auto":
+        return text
+    value = int(text)
+    if value < 0:
+        raise ValueError(text)
+    return value
+
+def main():
+    parser = argparse.ArgumentParser(description="Run scheduling policies on one input file")
+    parser.add_argument("input_file")
+    parser.add_argument("policies", help="policy or comma separated policies: "
+                        + ", ".join(sorted({name for name, _ in POLICIES})))
+    parser.add_argument("strategy", nargs="?", default="MAX",
+                        help="frequency strategy: " + ", ".join(FREQUENCY_STRATEGIES))
+    parser.add_argument("--format", choices=TRACE_FORMATS, default="text",
+                        help="trace format (none only prints the footer)")
+    parser.add_argument("--output", help="write the trace to this file instead of stdout")
+    parser.add_argument("--stats", action="store_true",
+                        help="print run counters and phase timings as JSON on stderr")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="run under cProfile and dump pstats data to FILE")
+    parser.add_argument("--procrastinate", type=delay_arg, default=0, metavar="DELAY",
+                        help="sleep up to DELAY time units past a release to lengthen idle "
+                        "periods; auto picks the largest delay that keeps the task set feasible")
+    args = parser.parse_args()
+
+    names = [n.strip().upper() for n in args.policies.split(",") if n.strip()]
+    strategy = args.strategy.upper()
+    try:
+        for name in names:
+            get_policy(name, strategy)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    if args.format == "binary" and args.output is None and len(names) > 1:
+        print("Error: binary traces of several policies need --output")
+        return 1
+
+    profiler = None
+    if args.profile:
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    config = SystemConfig()
+    parse_input(args.input_file, config)
+    probes = [Probe() for _ in names] if args.stats else [None] * len(names)
+    if args.procrastinate == "auto":
+        delays = [safe_procrastination(config, name, strategy) for name in names]
+    else:
+        delays = [args.procrastinate] * len(names)
+    # without a trace to write only the footer totals are accumulated
+    schedules = run_policies(config, [(name, strategy) for name in names], probes=probes,
+                             metrics_only=args.format == "none", delays=delays)
+    for name, schedule, probe in zip(names, schedules, probes):
+        out = args.output
+        if out is not None and len(names) > 1:
+            root, ext = os.path.splitext(out)
+            out = f"{root}.{name}{ext}"
+        with probe.phase("output") if probe is not None else contextlib.nullcontext():
+            print_schedule(schedule, algorithm_name(name, strategy), args.format, out)
+            if args.format == "binary" and out is not None:
+                write_trace_index(schedule, out)
+
+    if profiler is not None:
+        profiler.disable()
+        sys.stdout.flush()
+        profiler.dump_stats(args.profile)
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(15)
+    if args.stats:
+        for name, probe in zip(names, probes):
+            summary = probe.summary()
+            summary["policy"] = algorithm_name(name, strategy)
+            print(json.dumps(summary), file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+import sys
+from scheduler_common import *
+from scheduler_rm import schedule_rm
+from scheduler_edf import schedule_edf
+from scheduler_eerm import schedule_eerm
+from scheduler_eeedf import schedule_eeedf
+from scheduler_io import load_configs
+
+SCHEDULERS = {
+    "RM": schedule_rm,
+    "EDF": schedule_edf,
+    "EE RM": schedule_eerm,
+    "EE EDF": schedule_eeedf,
+}
+
+def configs_from_arrays(params, powers, idle_power, max_time, frequencies=None):
+    # params: stacked task parameters, shape (configs, tasks, 1 + frequencies) with
+    # rows [deadline, wcet_0, ..., wcet_n]; rows with deadline <= 0 are padding.
+    # powers is per config (configs, frequencies) or shared (frequencies,), idle_power
+    # and max_time are scalars or per config. NumPy arrays and nested lists both work.
+    if hasattr(params, "tolist"):
+        params = params.tolist()
+    if hasattr(powers, "tolist"):
+        powers = powers.tolist()
+    if hasattr(idle_power, "tolist"):
+        idle_power = idle_power.tolist()
+    if hasattr(max_time, "tolist"):
+        max_time = max_time.tolist()
+
+    shared_powers = len(powers) == 0 or not isinstance(powers[0], (list, tuple))
+    configs = []
+    for c, rows in enumerate(params):
+        cfg = SystemConfig()
+        cfg.powers = list(powers if shared_powers else powers[c])
+        cfg.frequencies = (list(frequencies) if frequencies is not None
+                           else default_frequencies(len(cfg.powers)))
+        cfg.idle_power = idle_power[c] if isinstance(idle_power, (list, tuple)) else idle_power
+        cfg.max_time = max_time[c] if isinstance(max_time, (list, tuple)) else max_time
+
+        cfg.tasks = [Task(f"w{i + 1}", int(row[0]), [int(w) for w in row[1:]])
+                     for i, row in enumerate(r for r in rows if r[0] > 0)]
+        cfg.num_tasks = len(cfg.tasks)
+        check_config(cfg)
+        configs.append(cfg)
+    return configs
+
+def evaluate(config, algorithm):
+    # footer metrics of one config: (total_energy, idle_percent, deadline_misses)
+    energy, idle_time, total_time, misses, _ = simulate_cycles(config, SCHEDULERS[algorithm])
+    idle_percent = (idle_time/float(total_time))*100.0 if total_time > 0 else 0.0
+    return energy, idle_percent, misses
+
+def admit(config, algorithm):
+    # analytic feasibility at full speed; if it fails there it fails at any frequency
+    fastest = [min(range(len(config.powers)), key=lambda f: config.tasks[i].wcet[f])
+               for i in range(config.num_tasks)]
+    if algorithm.endswith("RM"):
+        return admit_rm(config, fastest)
+    return admit_edf(config, fastest)
+
+def evaluate_batch(configs, algorithm, reject_infeasible=False):
+    # one call for a whole sweep: identical configs are simulated once and every
+    # run goes through the hyperperiod shortcut, so the cost is per distinct cycle.
+    # With reject_infeasible, configs failing the admission test are not simulated
+    # and get None.
+    if algorithm not in SCHEDULERS:
+        raise ValueError(f"unknown algorithm {algorithm!r}")
+    seen = {}
+    results = []
+    for cfg in configs:
+        key = config_key(cfg)
+        if key in seen:
+            r = seen[key]
+        else:
+            if reject_infeasible and not admit(cfg, algorithm):
+                r = None
+            else:
+                r = evaluate(cfg, algorithm)
+            seen[key] = r
+        results.append(r)
+    return results
+
+def main():
+    if len(sys.argv) < 3:
+        print(f"Usage: {sys.argv[0]} <RM|EDF|EE RM|EE EDF> <input_file>...")
+        return 1
+    # text inputs hold one config; .jsonl/.scfg/.npz files many, labelled file#k
+    labels = []
+    configs = []
+    for filename in sys.argv[2:]:
+        try:
+            loaded = load_configs(filename)
+        except (OSError, InputError) as e:
+            print(f"Error: {e}")
+            return 1
+        labels.extend([filename] if len(loaded) == 1 else
+                      [f"{filename}#{k + 1}" for k in range(len(loaded))])
+        configs.extend(loaded)
+    for label, (energy, idle_percent, misses) in zip(labels, evaluate_batch(configs, sys.argv[1])):
+        print(f"{label} TOTAL_ENERGY {energy:.3f}J IDLE_PERCENT {idle_percent:.2f}% MISSES {misses}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
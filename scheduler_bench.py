@@ -0,0 +1,159 @@
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from scheduler_common import *
+from scheduler_batch import SCHEDULERS
+
+# platform used for synthetic task sets: the one of input1.txt/input2.txt
+BENCH_POWERS = [625, 447, 307, 212]
+BENCH_IDLE_POWER = 84
+
+def uunifast(n, total, rng):
+    # n task utilizations summing to total, uniformly distributed (Bini & Buttazzo)
+    utils = []
+    remaining = total
+    for i in range(1, n):
+        nxt = remaining * rng.random() ** (1.0 / (n - i))
+        utils.append(remaining - nxt)
+        remaining = nxt
+    utils.append(remaining)
+    return utils
+
+def log_uniform_periods(n, low, high, rng):
+    # integer periods spread evenly over orders of magnitude in [low, high]
+    lo, hi = math.log(low), math.log(high)
+    return [max(1, int(round(math.exp(rng.uniform(lo, hi))))) for _ in range(n)]
+
+def random_config(num_tasks, util, max_time, rng, period_range=(10, 1000),
+                  frequencies=None, powers=None, idle_power=BENCH_IDLE_POWER):
+    # WCET at the top frequency is u * T, slower frequencies scale it by f_max / f.
+    # A period is at least ceil(1/u), beyond period_range if needed: with u * T < 1
+    # the WCET would round up to 1 and the set would get overloaded.
+    cfg = SystemConfig()
+    cfg.frequencies = list(DEFAULT_FREQUENCIES if frequencies is None else frequencies)
+    cfg.powers = list(BENCH_POWERS if powers is None else powers)
+    cfg.idle_power = idle_power
+    cfg.max_time = max_time
+    fmax = max(cfg.frequencies)
+    utils = uunifast(num_tasks, util, rng)
+    periods = []
+    for u in utils:
+        low = max(period_range[0], math.ceil(1 / u)) if u > 0 else period_range[0]
+        periods += log_uniform_periods(1, low, max(low, period_range[1]), rng)
+    for i, (u, period) in enumerate(zip(utils, periods)):
+        base = max(1, int(round(u * period)))
+        wcet = [max(1, int(math.ceil(base * fmax / f))) for f in cfg.frequencies]
+        cfg.tasks.append(Task(f"w{i + 1}", period, wcet))
+    cfg.num_tasks = num_tasks
+    check_config(cfg)
+    return cfg
+
+def time_call(fn, repeat):
+    # best wall time over `repeat` runs, then one traced run for the peak allocation
+    best = None
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    result = None
+    tracemalloc.start()
+    try:
+        result = fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak, result
+
+def bench_config(cfg, algorithms, repeat=3):
+    # one record per measured callable on this config
+    records = []
+    seconds, peak, jobs = time_call(lambda: generate_jobs(cfg), repeat)
+    records.append({"name": "generate_jobs", "seconds": seconds, "peak_bytes": peak,
+                     "jobs": len(jobs)})
+    for name in algorithms:
+        fn = SCHEDULERS[name]
+        seconds, peak, sched = time_call(lambda: fn(cfg), repeat)
+        records.append({"name": name, "seconds": seconds, "peak_bytes": peak,
+                        "entries": len(sched), "energy": schedule_totals(sched)[0],
+                        "misses": sched.deadline_misses})
+    return records
+
+def run_benchmarks(task_counts, horizons, util=0.7, seed=1, repeat=3, algorithms=None):
+    algorithms = list(SCHEDULERS) if algorithms is None else algorithms
+    for name in algorithms:
+        if name not in SCHEDULERS:
+            raise ValueError(f"unknown algorithm {name!r}")
+    results = []
+    for n in task_counts:
+        for horizon in horizons:
+            # one generator per case so a case does not depend on the ones before it
+            rng = random.Random(f"{seed}:{n}:{horizon}")
+            cfg = random_config(n, util, horizon, rng)
+            fastest = cfg.frequencies.index(max(cfg.frequencies))
+            for rec in bench_config(cfg, algorithms, repeat):
+                # realized at full speed: integer WCETs do not hit `util` exactly
+                rec.update(tasks=n, max_time=horizon,
+                           utilization=round(utilization(cfg, fastest), 4))
+                results.append(rec)
+    return results
+
+def compare(results, baseline, threshold=1.25):
+    # cases that got more than `threshold` times slower than in a saved run
+    old = {(r["name"], r["tasks"], r["max_time"]): r["seconds"] for r in baseline["results"]}
+    slower = []
+    for r in results:
+        before = old.get((r["name"], r["tasks"], r["max_time"]))
+        if before and r["seconds"] > before * threshold:
+            slower.append((r, before))
+    return slower
+
+def int_list(text):
+    return [int(v) for v in text.split(",") if v.strip()]
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the schedulers on synthetic task sets")
+    parser.add_argument("--tasks", type=int_list, default=[5, 50, 500],
+                        help="comma separated task counts")
+    parser.add_argument("--horizons", type=int_list, default=[1000, 10000, 100000],
+                        help="comma separated max_time values")
+    parser.add_argument("--util", type=float, default=0.7, help="total utilization at full speed")
+    parser.add_argument("-a", "--algorithms", default=",".join(SCHEDULERS))
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("-o", "--output", help="write the results as JSON")
+    parser.add_argument("--baseline", help="JSON from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="slowdown factor reported as a regression")
+    args = parser.parse_args()
+
+    algorithms = [a.strip() for a in args.algorithms.split(",") if a.strip()]
+    results = run_benchmarks(args.tasks, args.horizons, args.util, args.seed, args.repeat, algorithms)
+    for r in results:
+        print(f"{r['name']:<14} TASKS {r['tasks']:<6} MAX_TIME {r['max_time']:<8} "
+              f"{r['seconds'] * 1000:10.2f}ms PEAK {r['peak_bytes'] / 1024:10.1f}KiB")
+
+    if args.output:
+        doc = {"python": platform.python_version(), "seed": args.seed, "repeat": args.repeat,
+               "results": results}
+        with open(args.output, "w") as f:
+            json.dump(doc, f, indent=1)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            slower = compare(results, json.load(f), args.threshold)
+        for r, before in slower:
+            print(f"SLOWER {r['name']} TASKS {r['tasks']} MAX_TIME {r['max_time']} "
+                  f"{before * 1000:.2f}ms -> {r['seconds'] * 1000:.2f}ms")
+        if slower:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+import zlib
+from scheduler_common import *
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "scheduler")
+DEFAULT_MAX_BYTES = 256 << 20
+# eviction goes down to this share of max_bytes, so a full cache is not
+# rescanned on every put
+EVICT_TO = 0.9
+_STATS_FIELDS = TaskStats.__slots__
+_COLUMNS = ("start_time", "duration", "task_id", "frequency", "energy")
+
+def config_fingerprint(config):
+    # content hash of everything that influences a run (see config_key)
+    blob = json.dumps(config_key(config), separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+def _pack_trace(schedule):
+    # zlib-compressed struct-of-arrays: JSON header line, then the raw columns
+    header = {"names": schedule.task_names, "count": len(schedule)}
+    parts = [json.dumps(header).encode("utf-8"), b"\n"]
+    parts.extend(getattr(schedule, c).tobytes() for c in _COLUMNS)
+    return zlib.compress(b"".join(parts), 6)
+
+def _unpack_trace(blob):
+    data = zlib.decompress(blob)
+    end = data.index(b"\n")
+    header = json.loads(data[:end])
+    schedule = ScheduleTrace()
+    pos = end + 1
+    for c in _COLUMNS:
+        col = getattr(schedule, c)
+        size = header["count"] * col.itemsize
+        col.frombytes(data[pos:pos + size])
+        pos += size
+    schedule.task_names = header["names"]
+    schedule._task_ids = {name: i for i, name in enumerate(schedule.task_names)}
+    return schedule
+
+class ResultCache:
+    # Content-addressed on-disk results: <root>/<k[:2]>/<k>.json holds the footer
+    # metrics and task stats, <k>.trace.z the optional compressed trace. Files are
+    # written to a temporary name and moved in place with os.replace, so readers
+    # never need a lock and see either nothing or a whole entry. Writers serialize
+    # on an flock'ed lock file while they store and evict. A hit refreshes the
+    # entry's mtime, and eviction drops least recently used entries until the
+    # cache fits in max_bytes again (EVICT_TO of it). Writers keep a running
+    # total of the cache size in <root>/.size, so a put only scans the directory
+    # once the total passes max_bytes (or the file is missing).
+    def __init__(self, root=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root or os.environ.get("SCHEDULER_CACHE_DIR") or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        os.makedirs(self.root, exist_ok=True)
+
+    def key(self, config, algorithm):
+        blob = f"{ENGINE_VERSION}:{algorithm}:{config_fingerprint(config)}"
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def _path(self, key, suffix):
+        return os.path.join(self.root, key[:2], key + suffix)
+
+    def get(self, key, with_trace=False):
+        # (metrics dict, schedule or None), or None on a miss; a trace is only a
+        # hit if one was stored
+        path = self._path(key, ".json")
+        try:
+            with open(path, "rb") as f:
+                metrics = json.loads(f.read())
+            schedule = None
+            if with_trace:
+                with open(self._path(key, ".trace.z"), "rb") as f:
+                    schedule = _unpack_trace(f.read())
+                schedule.deadline_misses = metrics["deadline_misses"]
+                schedule.task_stats = _load_stats(metrics["task_stats"])
+            now = time.time()
+            os.utime(path, (now, now))
+        except (OSError, ValueError, KeyError, zlib.error):
+            return None
+        return metrics, schedule
+
+    def put(self, key, metrics, schedule=None):
+        os.makedirs(os.path.join(self.root, key[:2]), exist_ok=True)
+        with self._lock():
+            added = 0
+            if schedule is not None:
+                added += self._replace(self._path(key, ".trace.z"), _pack_trace(schedule))
+            added += self._replace(self._path(key, ".json"), json.dumps(metrics).encode("utf-8"))
+            total = self._total()
+            if total is None:
+                total = self._evict(self.max_bytes)
+            elif total + added > self.max_bytes:
+                total = self._evict(int(self.max_bytes * EVICT_TO))
+            else:
+                total += added
+            self._write(self._total_path(), str(total).encode("ascii"))
+
+    def _replace(self, path, data):
+        # write path, returning how much the cache grew
+        try:
+            old = os.stat(path).st_size
+        except OSError:
+            old = 0
+        self._write(path, data)
+        return len(data) - old
+
+    def _write(self, path, data):
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def _lock(self):
+        return _FileLock(os.path.join(self.root, ".lock"))
+
+    def _total_path(self):
+        return os.path.join(self.root, ".size")
+
+    def _total(self):
+        # running size total, None if it was never written (or is unreadable)
+        try:
+            with open(self._total_path(), "rb") as f:
+                return int(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def entries(self):
+        # key -> [last use, total bytes]; the metrics file's mtime is the last use
+        found = {}
+        for sub in os.listdir(self.root):
+            d = os.path.join(self.root, sub)
+            if len(sub) != 2 or not os.path.isdir(d):
+                continue
+            for name in os.listdir(d):
+                if name.startswith("."):
+                    continue
+                key, _, suffix = name.partition(".")
+                try:
+                    st = os.stat(os.path.join(d, name))
+                except OSError:
+                    continue
+                entry = found.setdefault(key, [0.0, 0])
+                entry[1] += st.st_size
+                if suffix == "json":
+                    entry[0] = st.st_mtime
+        return found
+
+    def size(self):
+        return sum(size for _, size in self.entries().values())
+
+    def _evict(self, limit):
+        # full scan dropping the oldest entries until at most limit bytes are left;
+        # returns the size left
+        entries = self.entries()
+        total = sum(size for _, size in entries.values())
+        for key, (_, size) in sorted(entries.items(), key=lambda kv: kv[1][0]):
+            if total <= limit:
+                break
+            self._remove(key)
+            total -= size
+        return total
+
+    def _remove(self, key):
+        # metrics first: without them the entry is already a miss
+        for suffix in (".json", ".trace.z"):
+            try:
+                os.unlink(self._path(key, suffix))
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        with self._lock():
+            for key in self.entries():
+                self._remove(key)
+            self._write(self._total_path(), b"0")
+
+class _FileLock:
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def __enter__(self):
+        self.file = open(self.path, "a")
+        if fcntl is not None:
+            fcntl.flock(self.file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self.file, fcntl.LOCK_UN)
+        self.file.close()
+
+def _dump_stats(task_stats):
+    return [{f: getattr(st, f) for f in _STATS_FIELDS} for st in task_stats]
+
+def _load_stats(rows):
+    out = []
+    for row in rows:
+        st = TaskStats()
+        for f in _STATS_FIELDS:
+            setattr(st, f, row[f])
+        out.append(st)
+    return out
+
+def schedule_metrics(schedule):
+    total_energy, idle_time, total_time = schedule_totals(schedule)
+    return {
+        "total_energy": total_energy,
+        "idle_time": idle_time,
+        "total_time": total_time,
+        "idle_percent": (idle_time/float(total_time))*100.0 if total_time > 0 else 0.0,
+        "deadline_misses": schedule.deadline_misses,
+        "entries": len(schedule),
+        "task_stats": _dump_stats(schedule.task_stats),
+    }
+
+def run_cached(config, algorithm, schedule_fn, cache=None, with_trace=False):
+    # (metrics, schedule or None) for schedule_fn(config), simulated only on a miss
+    # (metrics-only unless the trace is wanted)
+    cache = ResultCache() if cache is None else cache
+    key = cache.key(config, algorithm)
+    hit = cache.get(key, with_trace)
+    if hit is not None:
+        return hit
+    schedule = schedule_fn(config, metrics_only=not with_trace)
+    metrics = schedule_metrics(schedule)
+    cache.put(key, metrics, schedule if with_trace else None)
+    return metrics, schedule if with_trace else None
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ("size", "clear"):
+        print(f"Usage: {sys.argv[0]} size|clear [cache_dir]")
+        return 1
+    cache = ResultCache(sys.argv[2] if len(sys.argv) > 2 else None)
+    if sys.argv[1] == "size":
+        print(f"{cache.root} ENTRIES {len(cache.entries())} BYTES {cache.size()}")
+    else:
+        cache.clear()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
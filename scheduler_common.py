@@ -1,122 +1,1272 @@
-MAX_TASKS = 10
+import contextlib
+import copy
+from fractions import Fraction
+from bisect import bisect_right
+from array import array
+import heapq
+import math
+import struct
+import sys
+import time
+
 MAX_JOBS = 10000
-NUM_FREQUENCIES = 4
+# bump whenever a change alters simulation results; cached results depend on it
+ENGINE_VERSION = 1
+# the platform assumed when an input does not list its own P-states
+DEFAULT_FREQUENCIES = [1188, 918, 648, 384]
+NUM_FREQUENCIES = len(DEFAULT_FREQUENCIES)
 
 class Task:
-    def __init__(self):
-        self.name = ""
-        self.deadline = 0
-        self.wcet = [0] * NUM_FREQUENCIES
+    def __init__(self, name="", deadline=0, wcet=None):
+        self.name = name
+        self.deadline = deadline
+        self.wcet = [0] * NUM_FREQUENCIES if wcet is None else wcet
 
 class Job:
-    def __init__(self):
-        self.task = None
-        self.release_time = 0
-        self.absolute_deadline = 0
-        self.job_number = 0
+    __slots__ = ("task", "task_index", "release_time", "absolute_deadline", "job_number",
+                 "completed", "remaining_time", "selected_freq_index", "completion_time")
+
+    def __init__(self, task=None, task_index=0, release_time=0, absolute_deadline=0, job_number=0):
+        self.task = task
+        self.task_index = task_index
+        self.release_time = release_time
+        self.absolute_deadline = absolute_deadline
+        self.job_number = job_number
         self.completed = False
         self.remaining_time = None
         self.selected_freq_index = None
+        self.completion_time = None
+
+    @property
+    def response_time(self):
+        return None if self.completion_time is None else self.completion_time - self.release_time
+
+    @property
+    def lateness(self):
+        return None if self.completion_time is None else self.completion_time - self.absolute_deadline
+
+    @property
+    def missed(self):
+        return self.completion_time is not None and self.completion_time > self.absolute_deadline
+
+class TaskStats:
+    # constant-memory per-task accumulator over completed jobs; `unfinished` counts
+    # jobs whose deadline passed inside the horizon without completing (also misses)
+    __slots__ = ("name", "completed", "misses", "unfinished", "total_response",
+                 "max_response", "min_response", "max_lateness")
+
+    def __init__(self, name=""):
+        self.name = name
+        self.completed = 0
+        self.misses = 0
+        self.unfinished = 0
+        self.total_response = 0
+        self.max_response = None
+        self.min_response = None
+        self.max_lateness = None
+
+    def record(self, job):
+        response = job.completion_time - job.release_time
+        lateness = job.completion_time - job.absolute_deadline
+        self.completed += 1
+        self.total_response += response
+        if self.max_response is None or response > self.max_response:
+            self.max_response = response
+        if self.min_response is None or response < self.min_response:
+            self.min_response = response
+        if self.max_lateness is None or lateness > self.max_lateness:
+            self.max_lateness = lateness
+        if lateness > 0:
+            self.misses += 1
+
+    def merge(self, other, times=1):
+        # fold in `times` repetitions of another accumulator (hyperperiod reuse)
+        if times <= 0:
+            return
+        self.completed += times * other.completed
+        self.misses += times * other.misses
+        self.unfinished += times * other.unfinished
+        self.total_response += times * other.total_response
+        for attr, pick in (("max_response", max), ("min_response", min), ("max_lateness", max)):
+            v = getattr(other, attr)
+            if v is not None:
+                mine = getattr(self, attr)
+                setattr(self, attr, v if mine is None else pick(mine, v))
+
+    @property
+    def mean_response(self):
+        return self.total_response / self.completed if self.completed else 0.0
+
+    @property
+    def jitter(self):
+        # response-time jitter: spread between slowest and fastest completion
+        return self.max_response - self.min_response if self.completed else 0
 
 class ScheduleEntry:
-    def __init__(self):
-        self.start_time = 0
-        self.task_name = ""
-        self.frequency = 0
-        self.duration = 0
-        self.energy = 0.0
+    __slots__ = ("start_time", "task_name", "frequency", "duration", "energy")
+
+    def __init__(self, start_time=0, task_name="", frequency=0, duration=0, energy=0.0):
+        self.start_time = start_time
+        self.task_name = task_name
+        self.frequency = frequency
+        self.duration = duration
+        self.energy = energy
+
+class ScheduleTrace:
+    # struct-of-arrays schedule: one typed column per field, task names interned
+    # (-1 is IDLE). Indexing/iterating yields ScheduleEntry views, so code written
+    # for a list of entries keeps working.
+    # With coalesce=True an entry that continues the previous one (same task and
+    # frequency, IDLE included) is merged into it; `coalesced` counts the merges.
+    def __init__(self, coalesce=False):
+        self.coalesce = coalesce
+        self.coalesced = 0
+        self.start_time = array('q')
+        self.duration = array('q')
+        self.task_id = array('i')
+        self.frequency = array('i')
+        self.energy = array('d')
+        self.task_names = []
+        self._task_ids = {}
+        self.deadline_misses = 0
+        self.task_stats = []
+
+    def add(self, start_time, task_name, frequency, duration, energy):
+        if task_name == "IDLE":
+            tid = -1
+        else:
+            tid = self._task_ids.get(task_name)
+            if tid is None:
+                tid = len(self.task_names)
+                self._task_ids[task_name] = tid
+                self.task_names.append(task_name)
+        if (self.coalesce and self.start_time and self.task_id[-1] == tid
+                and self.frequency[-1] == frequency
+                and self.start_time[-1] + self.duration[-1] == start_time):
+            self.duration[-1] += duration
+            self.energy[-1] += energy
+            self.coalesced += 1
+            return
+        self.start_time.append(start_time)
+        self.duration.append(duration)
+        self.task_id.append(tid)
+        self.frequency.append(frequency)
+        self.energy.append(energy)
+
+    def append(self, entry):
+        self.add(entry.start_time, entry.task_name, entry.frequency, entry.duration, entry.energy)
+
+    def set_last(self, duration, energy):
+        self.duration[-1] = duration
+        self.energy[-1] = energy
+
+    def end_time(self):
+        return self.start_time[-1] + self.duration[-1] if self.start_time else 0
+
+    def _name(self, tid):
+        return "IDLE" if tid < 0 else self.task_names[tid]
+
+    def __len__(self):
+        return len(self.start_time)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[k] for k in range(*i.indices(len(self)))]
+        return ScheduleEntry(self.start_time[i], self._name(self.task_id[i]), self.frequency[i],
+                             self.duration[i], self.energy[i])
+
+    def __iter__(self):
+        names = self.task_names
+        for start, tid, freq, dur, e in zip(self.start_time, self.task_id, self.frequency,
+                                            self.duration, self.energy):
+            yield ScheduleEntry(start, "IDLE" if tid < 0 else names[tid], freq, dur, e)
+
+class ScheduleMetrics:
+    # metrics-only stand-in for ScheduleTrace: same add/set_last/end_time and
+    # deadline_misses/task_stats, but no entries are kept. The columns hold only
+    # the last entry (the engine may still extend it); every earlier one is folded
+    # into running counters, energy in entry order so the totals equal
+    # schedule_totals of the full trace. `entries` counts what the trace would hold.
+    def __init__(self, coalesce=False):
+        self.coalesce = coalesce
+        self.coalesced = 0
+        self.entries = 0
+        self.start_time = [0]
+        self.duration = [0]
+        self.task_id = [-1]
+        self.frequency = [0]
+        self.energy = [0.0]
+        self._last_name = None
+        self._energy = 0.0
+        self._idle = 0
+        self._busy = {}
+        self.deadline_misses = 0
+        self.task_stats = []
+
+    def add(self, start_time, task_name, frequency, duration, energy):
+        if (self.coalesce and self.entries and task_name == self._last_name
+                and self.frequency[0] == frequency
+                and self.start_time[0] + self.duration[0] == start_time):
+            self.duration[0] += duration
+            self.energy[0] += energy
+            self.coalesced += 1
+            return
+        if self.entries:
+            # fold the previous entry, which can no longer change
+            self._energy += self.energy[0]
+            if self.task_id[0] < 0:
+                self._idle += self.duration[0]
+            else:
+                busy = self._busy
+                f = self.frequency[0]
+                busy[f] = busy.get(f, 0) + self.duration[0]
+        self.entries += 1
+        self._last_name = task_name
+        self.start_time[0] = start_time
+        self.duration[0] = duration
+        self.task_id[0] = -1 if task_name == "IDLE" else 0
+        self.frequency[0] = frequency
+        self.energy[0] = energy
+
+    def append(self, entry):
+        self.add(entry.start_time, entry.task_name, entry.frequency, entry.duration, entry.energy)
+
+    def set_last(self, duration, energy):
+        self.duration[0] = duration
+        self.energy[0] = energy
+
+    def end_time(self):
+        return self.start_time[0] + self.duration[0] if self.entries else 0
+
+    def totals(self):
+        # (total energy, idle time, total time) like schedule_totals
+        if not self.entries:
+            return 0.0, 0, 0
+        idle_time = self._idle + (self.duration[0] if self.task_id[0] < 0 else 0)
+        return self._energy + self.energy[0], idle_time, self.end_time()
+
+    def set_totals(self, energy, idle_time, total_time, busy, entries):
+        # totals computed elsewhere (hyperperiod reuse); the last entry becomes an
+        # empty IDLE one at total_time, so totals()/end_time() report them as given
+        self._energy = energy
+        self._idle = idle_time
+        self._busy = dict(busy)
+        self.entries = entries
+        self._last_name = "IDLE"
+        self.start_time[0] = total_time
+        self.duration[0] = 0
+        self.task_id[0] = -1
+        self.frequency[0] = 0
+        self.energy[0] = 0.0
+
+    def busy_time(self):
+        # {frequency: time spent running at it}
+        busy = dict(self._busy)
+        if self.entries and self.task_id[0] >= 0:
+            f = self.frequency[0]
+            busy[f] = busy.get(f, 0) + self.duration[0]
+        return busy
+
+    def __len__(self):
+        return self.entries
+
+    def __iter__(self):
+        raise TypeError("a metrics-only schedule has no entries")
+
+class SleepState:
+    # low-power idle state: power (mW) while asleep, entry/exit latencies (time
+    # units, spent transitioning) and the energy of one entry + exit (mJ)
+    def __init__(self, name="", power=0, entry_latency=0, exit_latency=0, energy=0):
+        self.name = name
+        self.power = power
+        self.entry_latency = entry_latency
+        self.exit_latency = exit_latency
+        self.energy = energy
 
 class SystemConfig:
+    # task and frequency tables are sized by the input (see check_config);
+    # sleep_states and switch_energy (mJ per frequency change) default to the
+    # plain model: idle_power for every idle slice, free switches
     def __init__(self):
-        self.tasks = [Task() for _ in range(MAX_TASKS)]
+        self.tasks = []
         self.num_tasks = 0
         self.max_time = 0
-        self.frequencies = [1188, 918, 648, 384]
+        self.frequencies = list(DEFAULT_FREQUENCIES)
         self.powers = [0] * NUM_FREQUENCIES
         self.idle_power = 0
+        self.sleep_states = []
+        self.switch_energy = 0
+        self.freq_table = None
+
+def default_frequencies(count):
+    if count != len(DEFAULT_FREQUENCIES):
+        raise ValueError(f"{count} power values need a FREQ line listing {count} frequencies")
+    return list(DEFAULT_FREQUENCIES)
+
+def check_config(config):
+    # raise ValueError unless the tables are consistent with each other
+    nfreq = len(config.frequencies)
+    if nfreq == 0:
+        raise ValueError("at least one frequency is required")
+    if len(config.powers) != nfreq:
+        raise ValueError(f"{len(config.powers)} power values for {nfreq} frequencies")
+    if len(set(config.frequencies)) != nfreq:
+        raise ValueError("frequencies must be distinct")
+    if config.num_tasks < 0 or config.num_tasks > len(config.tasks):
+        raise ValueError(f"num_tasks is {config.num_tasks} but {len(config.tasks)} tasks are defined")
+    if config.max_time < 0:
+        raise ValueError("max_time must not be negative")
+    for task in config.tasks[:config.num_tasks]:
+        if task.deadline <= 0:
+            raise ValueError(f"task {task.name}: deadline must be positive")
+        if len(task.wcet) != nfreq:
+            raise ValueError(f"task {task.name}: {len(task.wcet)} WCET values for {nfreq} frequencies")
+        if any(w < 0 for w in task.wcet):
+            raise ValueError(f"task {task.name}: WCET must not be negative")
+    for state in config.sleep_states:
+        if min(state.power, state.entry_latency, state.exit_latency, state.energy) < 0:
+            raise ValueError(f"sleep state {state.name}: values must not be negative")
+    if config.switch_energy < 0:
+        raise ValueError("switch energy must not be negative")
+
+def sleep_state(config, dt):
+    # (index into config.sleep_states or None, energy) for an idle interval of
+    # known length dt: the state that is cheapest over dt among those whose entry
+    # and exit fit in it, later (deeper) states winning ties; None is plain idle.
+    # Constant work per interval for a given config.
+    best = None
+    energy = (config.idle_power/1000.0) * dt
+    for k, state in enumerate(config.sleep_states):
+        latency = state.entry_latency + state.exit_latency
+        if dt >= latency:
+            e = state.energy/1000.0 + (state.power/1000.0) * (dt - latency)
+            if e < energy or (best is not None and e == energy):
+                best, energy = k, e
+    return best, energy
+
+def idle_energy(config, dt):
+    if not config.sleep_states:
+        return (config.idle_power/1000.0) * dt
+    return sleep_state(config, dt)[1]
+
+class InputError(ValueError):
+    # a config that cannot be loaded; source and line (1-based) when known
+    def __init__(self, message, source=None, line=None):
+        ValueError.__init__(self, message)
+        self.message = message
+        self.source = source
+        self.line = line
+
+    def __str__(self):
+        where = "" if self.source is None else str(self.source)
+        if self.line is not None:
+            where = f"{where}, line {self.line}" if where else f"line {self.line}"
+        return f"{where}: {self.message}" if where else self.message
+
+def _ints(fields, source, line):
+    try:
+        return [int(v) for v in fields]
+    except ValueError:
+        raise InputError(f"expected integers, got {' '.join(fields)!r}", source, line) from None
+
+def _task_line(fields, nfreq):
+    # name, deadline and nfreq WCETs: such a line is a task even if its name is a
+    # directive keyword (FREQ has 1 + F fields, SWITCH 2, SLEEP a non-numeric name)
+    if len(fields) != 2 + nfreq:
+        return False
+    try:
+        for v in fields[1:]:
+            int(v)
+    except ValueError:
+        return False
+    return True
+
+def _directive(fields, nfreq, keywords):
+    return fields[0].upper() in keywords and not _task_line(fields, nfreq)
+
+def parse_config(lines, config=None, source=None):
+    # text format of parse_input from any iterable of lines; raises InputError
+    config = SystemConfig() if config is None else config
+    rows = [(n, line.split()) for n, line in enumerate(lines, 1) if line.strip()]
+    if not rows:
+        raise InputError("empty input", source)
+
+    n, fields = rows[0]
+    first_line = _ints(fields, source, n)
+    if len(first_line) < 4:
+        raise InputError("first line needs num_tasks, max_time, at least one power and idle power",
+                         source, n)
+    config.num_tasks = first_line[0]
+    config.max_time = first_line[1]
+    config.powers = first_line[2:-1]
+    config.idle_power = first_line[-1]
+    nfreq = len(config.powers)
+    config.sleep_states = []
+    config.switch_energy = 0
+    row_idx = 1
+
+    if row_idx < len(rows) and _directive(rows[row_idx][1], nfreq, ("FREQ",)):
+        n, fields = rows[row_idx]
+        config.frequencies = _ints(fields[1:], source, n)
+        row_idx += 1
+    else:
+        try:
+            config.frequencies = default_frequencies(nfreq)
+        except ValueError as e:
+            raise InputError(str(e), source, rows[0][0]) from None
+
+    while row_idx < len(rows) and _directive(rows[row_idx][1], nfreq, ("SLEEP", "SWITCH")):
+        n, fields = rows[row_idx]
+        if fields[0].upper() == "SLEEP":
+            if len(fields) != 6:
+                raise InputError("SLEEP needs a name, power, entry latency, exit latency and energy",
+                                 source, n)
+            config.sleep_states.append(SleepState(fields[1], *_ints(fields[2:], source, n)))
+        else:
+            if len(fields) != 2:
+                raise InputError("SWITCH needs the energy of one frequency change", source, n)
+            config.switch_energy = _ints(fields[1:], source, n)[0]
+        row_idx += 1
+
+    if len(rows) - row_idx < config.num_tasks:
+        raise InputError(f"expected {config.num_tasks} task lines, found {len(rows) - row_idx}", source)
+    config.tasks = []
+    for i in range(config.num_tasks):
+        n, parts = rows[row_idx]
+        if len(parts) != 2 + nfreq:
+            raise InputError(f"task line {i + 1} needs a name, a deadline and {nfreq} WCET values",
+                             source, n)
+        values = _ints(parts[1:], source, n)
+        config.tasks.append(Task(parts[0], values[0], values[1:]))
+        row_idx += 1
+    try:
+        check_config(config)
+    except ValueError as e:
+        raise InputError(str(e), source) from None
+    return config
 
 def parse_input(filename, config):
+    # First line: num_tasks max_time power_1 ... power_F idle_power, F >= 1.
+    # Optional next line: FREQ f_1 ... f_F (required unless F == 4, which keeps
+    # the default 1188/918/648/384 table).
+    # Optional, any number: SLEEP name power entry_latency exit_latency energy
+    # (name not a number), and SWITCH energy (mJ per frequency change).
+    # A line that reads as a task line is a task, whatever its name.
+    # Then one line per task: name deadline wcet_1 ... wcet_F
+    # Command-line helper: errors are printed and end the process; library code
+    # should call parse_config, which raises InputError instead.
     try:
         with open(filename, 'r') as file:
-            lines = [line.strip() for line in file.readlines() if line.strip()]
-            line_idx = 0
-            
-            # First line: num_tasks max_time power1 power2 power3 power4 idle_power
-            first_line = list(map(int, lines[line_idx].split()))
-            config.num_tasks = first_line[0]
-            config.max_time = first_line[1]
-            
-            # Read powers for each frequency (next 4 values)
-            for i in range(NUM_FREQUENCIES):
-                config.powers[i] = first_line[2 + i]
-            
-            # Read idle power (last value on first line)
-            config.idle_power = first_line[6]
-            line_idx += 1
-            
-            # Read tasks
-            for i in range(config.num_tasks):
-                parts = lines[line_idx].split()
-                config.tasks[i].name = parts[0]
-                config.tasks[i].deadline = int(parts[1])
-                for j in range(NUM_FREQUENCIES):
-                    config.tasks[i].wcet[j] = int(parts[2 + j])
-                line_idx += 1
-                
+            parse_config(file, config, filename)
+
     except FileNotFoundError:
         print(f"Error: Cannot open file {filename}")
         exit(1)
-    except (ValueError, IndexError) as e:
+    except InputError as e:
         print(f"Error parsing input file: {e}")
         print(f"Please check the input file format")
         exit(1)
 
+def iter_task_jobs(config, task_index):
+    # releases of one task, produced on demand
+    task = config.tasks[task_index]
+    release_time = 0
+    job_num = 0
+
+    while release_time < config.max_time:
+        yield Job(task, task_index, release_time, release_time + task.deadline, job_num)
+        release_time += task.deadline
+        job_num += 1
+
+def iter_jobs(config):
+    # streaming mode: all tasks merged by release time, ties in task order
+    return heapq.merge(*[iter_task_jobs(config, i) for i in range(config.num_tasks)],
+                       key=lambda j: j.release_time)
+
 def generate_jobs(config):
     jobs = []
-    
     for i in range(config.num_tasks):
-        task = config.tasks[i]
-        release_time = 0
-        job_num = 0
-        
-        while release_time < config.max_time:
-            job = Job()
-            job.task = task
-            job.release_time = release_time
-            job.absolute_deadline = release_time + task.deadline
-            job.job_number = job_num
-            job.completed = False
-            job.remaining_time = None
-            job.selected_freq_index = None
-            
-            jobs.append(job)
-            release_time += task.deadline
-            job_num += 1
-    
+        jobs.extend(iter_task_jobs(config, i))
     return jobs
 
-def print_schedule(schedule, algorithm_name):
-    print(f"\n================================================================")
-    print(f"Schedule: {algorithm_name}")
-    print(f"================================================================")
-    
-    total_energy = 0
+class FrequencyTable:
+    # Per task, the frequencies ordered by WCET together with the energy-optimal
+    # index among every prefix of that order. The frequencies that fit in a slack
+    # form a prefix, so a selection is one bisect instead of a scan over all of them.
+    def __init__(self, config):
+        self.key = frequency_table_key(config)
+        self.wcets = []
+        self.best = []
+        nfreq = len(config.powers)
+        for i in range(config.num_tasks):
+            wcet = config.tasks[i].wcet
+            order = sorted(range(nfreq), key=lambda f: wcet[f])
+            best = []
+            best_rank = None
+            for f in order:
+                # lowest energy wins, ties go to the lower frequency (higher index)
+                rank = ((config.powers[f] / 1000.0) * wcet[f], -f)
+                if best_rank is None or rank < best_rank:
+                    best_rank = rank
+                best.append(-best_rank[1])
+            self.wcets.append([wcet[f] for f in order])
+            self.best.append(best)
+
+    def select(self, task_index, time_available):
+        # default to max frequency when nothing fits
+        pos = bisect_right(self.wcets[task_index], time_available)
+        return self.best[task_index][pos - 1] if pos else 0
+
+def frequency_table_key(config):
+    return (tuple(config.powers),
+            tuple(tuple(t.wcet) for t in config.tasks[:config.num_tasks]))
+
+def get_frequency_table(config):
+    # built once per config, rebuilt when its tasks or power table changed
+    table = config.freq_table
+    if table is None or table.key != frequency_table_key(config):
+        table = FrequencyTable(config)
+        config.freq_table = table
+    return table
+
+def max_frequency_index(config, job, current_time):
+    return 0
+
+def select_frequency_index_ee(config, job, current_time):
+    # cheapest frequency whose WCET still meets the job's deadline
+    table = config.freq_table or get_frequency_table(config)
+    return table.select(job.task_index, job.absolute_deadline - current_time)
+
+class Probe:
+    # Opt-in run instrumentation, see Simulator(probe=...). Counts loop iterations,
+    # releases, preemptions, dispatches, context switches and frequency changes and
+    # accumulates perf_counter time per phase:
+    #   release   - moving due jobs to the ready heap, preemption tests included
+    #   select    - dropping completed jobs and picking the next one
+    #   frequency - select_freq calls
+    #   trace     - trace appends/extensions
+    #   output    - whatever the caller wraps in phase("output")
+    # Without a probe the engine pays a few `is None` tests per event.
+    PHASES = ("release", "select", "frequency", "trace", "output")
+
+    def __init__(self):
+        self.iterations = 0
+        self.releases = 0
+        self.preemptions = 0
+        self.dispatches = 0
+        self.context_switches = 0
+        self.frequency_changes = 0
+        self.phase_time = dict.fromkeys(self.PHASES, 0.0)
+        self._last_job = None
+        self._last_freq = None
+
+    def timed(self, phase, fn):
+        # fn wrapped so its run time is charged to phase
+        times = self.phase_time
+        clock = time.perf_counter
+
+        def wrapper(*args):
+            t0 = clock()
+            try:
+                return fn(*args)
+            finally:
+                times[phase] += clock() - t0
+        return wrapper
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phase_time[name] = self.phase_time.get(name, 0.0) + time.perf_counter() - t0
+
+    def attach(self, sim):
+        # instrument a Simulator by shadowing its callbacks on the instance
+        release = sim._release
+        times = self.phase_time
+        clock = time.perf_counter
+
+        def timed_release():
+            t0 = clock()
+            before = len(sim._ready)
+            preempted = release()
+            self.releases += len(sim._ready) - before
+            if preempted:
+                self.preemptions += 1
+            times["release"] += clock() - t0
+            return preempted
+        sim._release = timed_release
+        sim.select_freq = self.timed("frequency", sim.select_freq)
+        sim.schedule.add = self.timed("trace", sim.schedule.add)
+        sim.schedule.set_last = self.timed("trace", sim.schedule.set_last)
+
+    def selected(self, t0):
+        self.phase_time["select"] += time.perf_counter() - t0
+
+    def dispatch(self, job):
+        # job starts running (new, resumed or after a preemption)
+        self.dispatches += 1
+        if job is not self._last_job:
+            if self._last_job is not None:
+                self.context_switches += 1
+            self._last_job = job
+        if job.selected_freq_index != self._last_freq:
+            if self._last_freq is not None:
+                self.frequency_changes += 1
+            self._last_freq = job.selected_freq_index
+
+    def summary(self):
+        return {
+            "iterations": self.iterations,
+            "releases": self.releases,
+            "preemptions": self.preemptions,
+            "dispatches": self.dispatches,
+            "context_switches": self.context_switches,
+            "frequency_changes": self.frequency_changes,
+            "phase_seconds": dict(self.phase_time),
+        }
+
+class Simulator:
+    # Stateful event-driven core shared by all schedulers:
+    #   priority(job)      -> sort key of a ready job (smaller runs first, ties go to task/job order)
+    #   preempts(job, cur) -> True if releasing job interrupts the running job cur
+    #   select_freq(...)   -> frequency index fixed for a job the first time it runs
+    # Pending releases sit in a heap keyed by release time (one entry per periodic
+    # task plus any explicit/sporadic jobs), ready jobs in a heap keyed by priority
+    # (completed ones dropped lazily), so a step costs O(log n) per event.
+    # jobs=None releases every task periodically before release_limit (None: forever);
+    # coalesce=True merges back-to-back entries of the same task/frequency in the trace;
+    # on_complete(job) is called for every finished job (completion_time is set), and
+    # per-task response/miss aggregates end up in schedule.task_stats; a Probe
+    # collects counters and phase timings. metrics_only=True records into a
+    # ScheduleMetrics (footer totals only) instead of a ScheduleTrace.
+    # Idle slices are charged as the best sleep state of the config for their
+    # length, a frequency change adds config.switch_energy to the slice it starts.
+    # procrastinate=Z keeps the processor asleep up to Z time units past the
+    # release that ends an idle period, so idle periods get longer (see
+    # procrastination_delay for a Z that keeps the task set feasible).
+    #
+    # advance(t) simulates up to t and can be called repeatedly; tasks and sporadic
+    # jobs can be added or removed in between without touching the past.
+    def __init__(self, config, priority, preempts, select_freq=max_frequency_index,
+                 pad_to_horizon=True, coalesce=False, on_complete=None, jobs=None,
+                 release_limit=None, probe=None, metrics_only=False, procrastinate=0):
+        self.config = config
+        self.priority = priority
+        self.preempts = preempts
+        self.select_freq = select_freq
+        self.pad_to_horizon = pad_to_horizon
+        self.on_complete = on_complete
+        self.release_limit = release_limit
+        self.procrastinate = procrastinate
+
+        self.current_time = 0
+        self.horizon = 0
+        self.cur = None
+        self.stopped = False
+        self.finished = False
+        self.schedule = ScheduleMetrics(coalesce) if metrics_only else ScheduleTrace(coalesce)
+        self.stats = [TaskStats(config.tasks[i].name) for i in range(config.num_tasks)]
+        self.schedule.task_stats = self.stats
+
+        self._pending = []
+        self._ready = []
+        self._seq = 0
+        self._job_counts = [0] * config.num_tasks
+        self._removed = set()
+        self._sleep_until = 0
+        self._last_freq = None
+        self._extra = 0.0   # switch energy included in the last running entry
+
+        if select_freq is not max_frequency_index:
+            get_frequency_table(config)
+        self.probe = probe
+        if probe is not None:
+            probe.attach(self)
+
+        if jobs is None:
+            for i in range(config.num_tasks):
+                self._push_periodic(i, 0)
+        else:
+            for j in jobs:
+                j.completed = False
+                j.remaining_time = None
+                j.selected_freq_index = None
+                j.completion_time = None
+                self._push(j, False)
+
+    def _push(self, job, periodic):
+        heapq.heappush(self._pending, (job.release_time, job.task_index, job.job_number, self._seq,
+                                       job, periodic))
+        self._seq += 1
+
+    def _push_periodic(self, task_index, release_time):
+        if task_index in self._removed:
+            return
+        if self.release_limit is not None and release_time >= self.release_limit:
+            return
+        task = self.config.tasks[task_index]
+        job = Job(task, task_index, release_time, release_time + task.deadline,
+                  self._job_counts[task_index])
+        self._job_counts[task_index] += 1
+        self._push(job, True)
+
+    def _release(self):
+        # move every due job to the ready heap; True if one of them preempts cur
+        preempted = False
+        pending = self._pending
+        cur = self.cur
+        while pending and pending[0][0] <= self.current_time:
+            _, _, _, _, j, periodic = heapq.heappop(pending)
+            if periodic:
+                self._push_periodic(j.task_index, j.release_time + j.task.deadline)
+            heapq.heappush(self._ready, (self.priority(j), j.task_index, j.job_number, self._seq, j))
+            self._seq += 1
+            if cur is not None and self.preempts(j, cur):
+                preempted = True
+        return preempted
+
+    def _idle(self, dt):
+        # back-to-back idle (only possible across advance() calls) stays one entry,
+        # charged as one interval
+        schedule = self.schedule
+        if schedule and schedule.task_id[-1] < 0 and schedule.end_time() == self.current_time:
+            duration = schedule.duration[-1] + dt
+            schedule.set_last(duration, idle_energy(self.config, duration))
+        else:
+            schedule.add(self.current_time, "IDLE", 0, dt, idle_energy(self.config, dt))
+        self.current_time += dt
+
+    def next_release(self):
+        return self._pending[0][0] if self._pending else None
+
+    def advance(self, until):
+        config = self.config
+        schedule = self.schedule
+        ready = self._ready
+        pending = self._pending
+        probe = self.probe
+        self.horizon = max(self.horizon, until)
+
+        while not self.stopped and self.current_time < until:
+            current_time = self.current_time
+            if probe is not None:
+                probe.iterations += 1
+            preempted = self._release()
+
+            # a release that does not preempt lets the running job carry on in the same entry
+            cur = self.cur
+            extend = cur is not None and not preempted
+            if not extend:
+                if probe is not None:
+                    t0 = time.perf_counter()
+                while ready and ready[0][-1].completed:
+                    heapq.heappop(ready)
+
+                sleeping = current_time < self._sleep_until
+                if not ready or sleeping:
+                    self.cur = None
+                    if not ready and not pending:
+                        # nothing left: idle to the horizon, or stop at the last completion
+                        if self.pad_to_horizon:
+                            self._idle(until - current_time)
+                        break
+                    if sleeping:
+                        wake = self._sleep_until
+                    else:
+                        wake = pending[0][0]
+                        if self.procrastinate:
+                            wake = self._sleep_until = wake + self.procrastinate
+                    idle_dt = min(wake, until) - current_time
+                    if idle_dt <= 0:
+                        self.stopped = True
+                        break
+                    self._idle(idle_dt)
+                    continue
+
+                cur = self.cur = ready[0][-1]
+                if probe is not None:
+                    probe.selected(t0)
+                if cur.selected_freq_index is None:
+                    idx = self.select_freq(config, cur, current_time)
+                    cur.selected_freq_index = idx
+                    cur.remaining_time = cur.task.wcet[idx]
+                if probe is not None:
+                    probe.dispatch(cur)
+
+            freq_index = cur.selected_freq_index
+
+            # slice to completion, to the next release or to the horizon
+            next_evt = until
+            if pending and pending[0][0] < next_evt:
+                next_evt = pending[0][0]
+            dt = min(cur.remaining_time, next_evt - current_time)
+            if dt <= 0:
+                self.stopped = True
+                break
+
+            power = config.powers[freq_index]
+            if extend:
+                duration = schedule.duration[-1] + dt
+                schedule.set_last(duration, (power/1000.0) * duration + self._extra)
+            else:
+                extra = 0.0
+                if freq_index != self._last_freq:
+                    if self._last_freq is not None:
+                        extra = config.switch_energy/1000.0
+                    self._last_freq = freq_index
+                merged = schedule.coalesced
+                schedule.add(current_time, cur.task.name, config.frequencies[freq_index], dt,
+                             (power/1000.0) * dt + extra)
+                if schedule.coalesced == merged:
+                    # a new entry; one coalesced into the previous keeps its own
+                    self._extra = extra
+
+            current_time = self.current_time = current_time + dt
+            cur.remaining_time -= dt
+            if cur.remaining_time <= 0:
+                cur.completed = True
+                cur.completion_time = current_time
+                self.stats[cur.task_index].record(cur)
+                if current_time > cur.absolute_deadline:
+                    schedule.deadline_misses += 1
+                if self.on_complete is not None:
+                    self.on_complete(cur)
+                if ready[0][-1] is cur:
+                    heapq.heappop(ready)
+                self.cur = None
+        return schedule
+
+    def add_task(self, task, start_time=None):
+        # new periodic task released from start_time (default: now); returns its index
+        config = self.config
+        i = config.num_tasks
+        if i < len(config.tasks):
+            config.tasks[i] = task
+        else:
+            config.tasks.append(task)
+        config.num_tasks += 1
+        self.stats.append(TaskStats(task.name))
+        self._job_counts.append(0)
+        if self.select_freq is not max_frequency_index:
+            get_frequency_table(config)
+        start = self.current_time if start_time is None else max(start_time, self.current_time)
+        self._push_periodic(i, start)
+        return i
+
+    def submit_job(self, task_index, release_time=None, relative_deadline=None):
+        # one sporadic job of an existing task; a release in the past is released now
+        task = self.config.tasks[task_index]
+        release = self.current_time if release_time is None else release_time
+        deadline = task.deadline if relative_deadline is None else relative_deadline
+        job = Job(task, task_index, release, release + deadline, self._job_counts[task_index])
+        self._job_counts[task_index] += 1
+        self._push(job, False)
+        return job
+
+    def remove_task(self, task_index, drop_released=False):
+        # no further releases; with drop_released its released jobs are discarded too
+        self._removed.add(task_index)
+        kept = [p for p in self._pending if p[1] != task_index]
+        if len(kept) != len(self._pending):
+            heapq.heapify(kept)
+            self._pending = kept
+        if drop_released:
+            for item in self._ready:
+                if item[-1].task_index == task_index:
+                    item[-1].completed = True
+            if self.cur is not None and self.cur.task_index == task_index:
+                self.cur = None
+
+    def finish(self, horizon=None):
+        # close the run: count jobs that missed inside the horizon and pad if asked
+        if self.finished:
+            return self.schedule
+        self.finished = True
+        horizon = self.horizon if horizon is None else horizon
+        schedule = self.schedule
+
+        # jobs still unfinished when their deadline passed inside the horizon also missed
+        for item in self._ready:
+            j = item[-1]
+            if not j.completed and j.absolute_deadline <= horizon:
+                schedule.deadline_misses += 1
+                self.stats[j.task_index].unfinished += 1
+
+        # pad to the horizon so the footer reports the full simulated time
+        if self.pad_to_horizon and schedule and schedule.end_time() < horizon:
+            self.current_time = schedule.end_time()
+            self._idle(horizon - self.current_time)
+        return schedule
+
+def simulate(config, jobs, priority, preempts, select_freq=max_frequency_index, pad_to_horizon=True,
+             coalesce=False, on_complete=None, probe=None, metrics_only=False, procrastinate=0):
+    # one-shot run from 0 to config.max_time; jobs=None releases the tasks lazily,
+    # so only live jobs are held in memory
+    sim = Simulator(config, priority, preempts, select_freq, pad_to_horizon, coalesce,
+                    on_complete, jobs, release_limit=config.max_time, probe=probe,
+                    metrics_only=metrics_only, procrastinate=procrastinate)
+    sim.advance(config.max_time)
+    return sim.finish(config.max_time)
+
+def schedule_totals(schedule):
+    # (total energy, idle time, total time) as reported by the footers
+    if isinstance(schedule, ScheduleMetrics):
+        return schedule.totals()
+    if isinstance(schedule, ScheduleTrace):
+        idle_time = 0
+        for tid, dur in zip(schedule.task_id, schedule.duration):
+            if tid < 0:
+                idle_time += dur
+        return sum(schedule.energy, 0.0), idle_time, schedule.end_time()
+
+    total_energy = 0.0
     idle_time = 0
-    
-    for entry in schedule:
-        if entry.task_name == "IDLE":
-            print(f"{entry.start_time} IDLE IDLE {entry.duration} {entry.energy:.3f}J")
-            idle_time += entry.duration
+    for s in schedule:
+        total_energy += s.energy
+        if s.task_name == "IDLE":
+            idle_time += s.duration
+    total_time = 0 if not schedule else schedule[-1].start_time + schedule[-1].duration
+    return total_energy, idle_time, total_time
+
+def config_key(config):
+    # hashable snapshot of everything that influences a simulation
+    tasks = tuple((t.name, t.deadline, tuple(t.wcet)) for t in config.tasks[:config.num_tasks])
+    key = (tasks, config.max_time, tuple(config.frequencies), tuple(config.powers),
+           config.idle_power)
+    if config.sleep_states or config.switch_energy:
+        # only present when used, so keys of plain configs stay as they were
+        key += (tuple((st.name, st.power, st.entry_latency, st.exit_latency, st.energy)
+                      for st in config.sleep_states), config.switch_energy)
+    return key
+
+def _task_freqs(config, freqs):
+    # freqs: one frequency index for every task, or a per-task list
+    return [freqs] * config.num_tasks if isinstance(freqs, int) else list(freqs)
+
+def utilization(config, freqs=0):
+    fs = _task_freqs(config, freqs)
+    return sum(config.tasks[i].wcet[fs[i]] / config.tasks[i].deadline for i in range(config.num_tasks))
+
+def liu_layland_bound(n):
+    return n * (2 ** (1.0 / n) - 1) if n > 0 else 1.0
+
+def rm_response_times(config, freqs=0, blocking=0):
+    # exact response-time analysis for RM with D == T and synchronous release:
+    # R = B + C_i + sum over higher priority j of ceil(R / T_j) * C_j, iterated to
+    # a fixed point. Equal periods rank in task order like the schedulers do.
+    # A task whose response time exceeds its deadline gets None.
+    fs = _task_freqs(config, freqs)
+    order = sorted(range(config.num_tasks), key=lambda i: (config.tasks[i].deadline, i))
+    response = [None] * config.num_tasks
+    higher = []
+    for i in order:
+        task = config.tasks[i]
+        c = task.wcet[fs[i]]
+        r = blocking + c
+        while r <= task.deadline:
+            nxt = blocking + c + sum(-(-r // t) * w for t, w in higher)
+            if nxt == r:
+                response[i] = r
+                break
+            r = nxt
+        higher.append((task.deadline, c))
+    return response
+
+def admit_edf(config, freqs=0):
+    # D == T: EDF is feasible iff U <= 1 (exact arithmetic, no rounding at the bound)
+    fs = _task_freqs(config, freqs)
+    return sum(Fraction(config.tasks[i].wcet[fs[i]], config.tasks[i].deadline)
+               for i in range(config.num_tasks)) <= 1
+
+def admit_rm(config, freqs=0):
+    # Liu-Layland as a sufficient shortcut, U > 1 as a quick reject, RTA otherwise
+    u = utilization(config, freqs)
+    if u <= liu_layland_bound(config.num_tasks):
+        return True
+    if not admit_edf(config, freqs):
+        return False
+    return all(r is not None for r in rm_response_times(config, freqs))
+
+def procrastination_delay(config, freqs=0, policy="EDF"):
+    # Largest Z for Simulator(procrastinate=Z) that keeps the task set feasible
+    # at `freqs`: waking up to Z after a release delays every job by at most Z,
+    # i.e. acts as a blocking term. EDF (D == T): Z <= (1 - U) * D_min; RM: the
+    # largest blocking the response-time analysis accepts. 0 if there is no slack.
+    if config.num_tasks == 0:
+        return 0
+    d_min = min(config.tasks[i].deadline for i in range(config.num_tasks))
+    if policy != "RM":
+        fs = _task_freqs(config, freqs)
+        slack = 1 - sum(Fraction(config.tasks[i].wcet[fs[i]], config.tasks[i].deadline)
+                        for i in range(config.num_tasks))
+        return max(0, math.floor(slack * d_min))
+    def fits(z):
+        return all(r is not None for r in rm_response_times(config, freqs, z))
+    if not fits(0):
+        return 0
+    lo, hi = 0, d_min
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if fits(mid):
+            lo = mid
         else:
-            print(f"{entry.start_time} {entry.task_name} {entry.frequency} {entry.duration} {entry.energy:.3f}J")
-        total_energy += entry.energy
-    
+            hi = mid - 1
+    return lo
+
+def hyperperiod(config):
+    h = 1
+    for i in range(config.num_tasks):
+        d = config.tasks[i].deadline
+        h = h * d // math.gcd(h, d)
+    return h
+
+def simulate_cycles(config, schedule_fn, with_trace=False):
+    # Periodic tasks with D == T and synchronous release are back at the initial
+    # state at the hyperperiod H if every job released before H has finished by then.
+    # In that case only one cycle and the tail (max_time % H) are simulated and the
+    # rest is extrapolated. Returns (total_energy, idle_time, total_time,
+    # deadline_misses, schedule). Without with_trace the runs are metrics-only
+    # (schedule_fn takes metrics_only=) and schedule is a ScheduleMetrics holding
+    # the extrapolated totals, misses and task stats.
+    # Each cycle would start from an unknown frequency, so the switch at a cycle
+    # boundary cannot be charged: configs with switch energy are run in full.
+    h = hyperperiod(config) if config.num_tasks > 0 and not config.switch_energy else 0
+    cycles = config.max_time // h if h > 0 else 0
+    metrics_only = not with_trace
+
+    if cycles >= 2:
+        cycle_cfg = copy.copy(config)
+        cycle_cfg.max_time = h
+        cycle_jobs = generate_jobs(cycle_cfg)
+        cycle = schedule_fn(cycle_cfg, cycle_jobs, metrics_only=metrics_only)
+        if not all(j.completed for j in cycle_jobs):
+            cycles = 0
+    else:
+        cycles = 0
+
+    if cycles == 0:
+        schedule = schedule_fn(config, metrics_only=metrics_only)
+        totals = schedule_totals(schedule)
+        return totals + (schedule.deadline_misses, schedule)
+
+    # a closed cycle idles up to H, where the next synchronous release happens
+    closed = list(cycle) if with_trace else None
+    cycle_energy, cycle_idle, cycle_end = schedule_totals(cycle)
+    cycle_entries = len(cycle)
+    if cycle_end < h:
+        pad = ScheduleEntry(cycle_end, "IDLE", 0, h - cycle_end, idle_energy(config, h - cycle_end))
+        if with_trace:
+            closed.append(pad)
+        cycle_energy += pad.energy
+        cycle_idle += pad.duration
+        cycle_entries += 1
+
+    rest = config.max_time - cycles * h
+    if rest > 0:
+        full_cycles = cycles
+        tail_cfg = copy.copy(config)
+        tail_cfg.max_time = rest
+        tail = schedule_fn(tail_cfg, metrics_only=metrics_only)
+    else:
+        # the last cycle ends the run, so it keeps its own (unpadded) ending
+        full_cycles = cycles - 1
+        tail = cycle
+
+    tail_energy, tail_idle, tail_end = schedule_totals(tail)
+    offset = full_cycles * h
+    total_energy = full_cycles * cycle_energy + tail_energy
+    idle_time = full_cycles * cycle_idle + tail_idle
+    total_time = offset + tail_end if tail else offset
+    deadline_misses = full_cycles * cycle.deadline_misses + tail.deadline_misses
+
+    if with_trace:
+        schedule = ScheduleTrace()
+        for k in range(full_cycles + 1):
+            part = closed if k < full_cycles else tail
+            for e in part:
+                schedule.add(k * h + e.start_time, e.task_name, e.frequency,
+                             e.duration, e.energy)
+    else:
+        busy = {f: full_cycles * t for f, t in cycle.busy_time().items()}
+        for f, t in tail.busy_time().items():
+            busy[f] = busy.get(f, 0) + t
+        schedule = ScheduleMetrics()
+        schedule.set_totals(total_energy, idle_time, total_time, busy,
+                            full_cycles * cycle_entries + len(tail))
+    schedule.deadline_misses = deadline_misses
+    schedule.task_stats = [TaskStats(t.name) for t in cycle.task_stats]
+    for acc, c, t in zip(schedule.task_stats, cycle.task_stats, tail.task_stats):
+        acc.merge(c, full_cycles)
+        acc.merge(t)
+    return total_energy, idle_time, total_time, deadline_misses, schedule
+
+def print_task_stats(schedule):
+    print("TASK JOBS MISSES MEAN_RESPONSE MAX_RESPONSE JITTER MAX_LATENESS")
+    for st in schedule.task_stats:
+        max_response = "-" if st.max_response is None else st.max_response
+        max_lateness = "-" if st.max_lateness is None else st.max_lateness
+        print(f"{st.name} {st.completed} {st.misses + st.unfinished} {st.mean_response:.2f} "
+              f"{max_response} {st.jitter} {max_lateness}")
+
+# binary trace: header, task names, frequency table, then fixed-width records
+TRACE_MAGIC = b"SCHT"
+TRACE_VERSION = 1
+TRACE_HEADER = struct.Struct("<4sHHII")   # magic, version, reserved, #names, #frequencies
+TRACE_RECORD = struct.Struct("<qqiid")    # start, duration, task id, frequency index, energy
+TRACE_FORMATS = ("text", "csv", "binary", "none")
+
+class TraceWriter:
+    # Buffered trace output. Entries are formatted in batches and written as one
+    # chunk; a filename is opened with `buffer_size` bytes of buffering.
+    #   text   - the human-readable lines of print_schedule (fixed_start=True gives
+    #            the "0.000 w1 1188 ..." style of the RM/EDF scripts)
+    #   csv    - start,task,frequency,duration,energy with full-precision energy
+    #   binary - TRACE_HEADER + names + frequencies + TRACE_RECORDs, IDLE is task -1
+    #   none   - nothing is written, the footer can still be computed from the trace
+    def __init__(self, out=None, fmt="text", buffer_size=1 << 20, batch=8192,
+                 fixed_start=False, frequencies=None):
+        if fmt not in TRACE_FORMATS:
+            raise ValueError(f"unknown trace format {fmt!r}")
+        self.fmt = fmt
+        self.batch = batch
+        self.fixed_start = fixed_start
+        self.frequencies = frequencies
+        self._own = False
+        if fmt == "none":
+            self.out = None
+        elif out is None:
+            self.out = sys.stdout.buffer if fmt == "binary" else sys.stdout
+        elif isinstance(out, str):
+            self.out = open(out, "wb" if fmt == "binary" else "w", buffering=buffer_size)
+            self._own = True
+        else:
+            self.out = out
+        self._header_done = False
+
+    def _binary_header(self, names, freqs):
+        parts = [TRACE_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, 0, len(names), len(freqs))]
+        for name in names:
+            raw = name.encode("utf-8")
+            parts.append(struct.pack("<H", len(raw)) + raw)
+        parts.append(struct.pack(f"<{len(freqs)}q", *freqs))
+        return b"".join(parts)
+
+    def write(self, schedule):
+        if self.out is None:
+            return
+        if isinstance(schedule, ScheduleTrace):
+            names = schedule.task_names
+            rows = zip(schedule.start_time, schedule.task_id, schedule.frequency,
+                       schedule.duration, schedule.energy)
+        else:
+            names = []
+            ids = {}
+            rows = []
+            for e in schedule:
+                tid = -1
+                if e.task_name != "IDLE":
+                    tid = ids.setdefault(e.task_name, len(names))
+                    if tid == len(names):
+                        names.append(e.task_name)
+                rows.append((e.start_time, tid, e.frequency, e.duration, e.energy))
+
+        if self.fmt == "binary":
+            freqs = self.frequencies
+            if freqs is None:
+                if isinstance(schedule, ScheduleTrace):
+                    used = {f for f, tid in zip(schedule.frequency, schedule.task_id) if tid >= 0}
+                else:
+                    used = {r[2] for r in rows if r[1] >= 0}
+                # default table: the frequencies in use, fastest first
+                freqs = self.frequencies = sorted(used, reverse=True)
+            self._write_binary(names, freqs, rows)
+            return
+
+        if self.fmt == "csv" and not self._header_done:
+            self.out.write("start,task,frequency,duration,energy\n")
+        self._header_done = True
+        buf = []
+        for start, tid, freq, dur, energy in rows:
+            if self.fmt == "csv":
+                if tid < 0:
+                    buf.append(f"{start},IDLE,,{dur},{energy!r}")
+                else:
+                    buf.append(f"{start},{names[tid]},{freq},{dur},{energy!r}")
+            else:
+                st = f"{start:.3f}" if self.fixed_start else start
+                if tid < 0:
+                    buf.append(f"{st} IDLE IDLE {dur} {energy:.3f}J")
+                else:
+                    buf.append(f"{st} {names[tid]} {freq} {dur} {energy:.3f}J")
+            if len(buf) >= self.batch:
+                buf.append("")
+                self.out.write("\n".join(buf))
+                buf = []
+        if buf:
+            buf.append("")
+            self.out.write("\n".join(buf))
+
+    def _write_binary(self, names, freqs, rows):
+        freq_index = {f: i for i, f in enumerate(freqs)}
+        if not self._header_done:
+            self.out.write(self._binary_header(names, freqs))
+            self._header_done = True
+        size = TRACE_RECORD.size
+        chunk = bytearray(size * self.batch)
+        pack_into = TRACE_RECORD.pack_into
+        n = 0
+        for start, tid, freq, dur, energy in rows:
+            pack_into(chunk, n * size, start, dur, tid, -1 if tid < 0 else freq_index[freq], energy)
+            n += 1
+            if n == self.batch:
+                self.out.write(chunk)
+                n = 0
+        if n:
+            self.out.write(chunk[:n * size])
+
+    def close(self):
+        if self.out is not None:
+            if self._own:
+                self.out.close()
+            else:
+                self.out.flush()
+            self.out = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def write_trace(schedule, out=None, fmt="text", buffer_size=1 << 20, fixed_start=False,
+                frequencies=None):
+    with TraceWriter(out, fmt, buffer_size, fixed_start=fixed_start,
+                     frequencies=frequencies) as writer:
+        writer.write(schedule)
+
+def print_schedule_footer(schedule):
+    total_energy, idle_time, total_time = schedule_totals(schedule)
     if schedule:
-        total_time = schedule[-1].start_time + schedule[-1].duration
         idle_percentage = (idle_time / total_time) * 100.0
-        
+
         print(f"\n----------------------------------------------------------------")
         print(f"Total Energy Consumption: {total_energy:.3f} J")
         print(f"Percentage Idle Time: {idle_percentage:.2f}%")
         print(f"Total Execution Time: {total_time} seconds")
         print(f"================================================================\n")
+
+def print_schedule(schedule, algorithm_name, fmt="text", out=None):
+    if fmt == "binary" and (out is None or out is sys.stdout or out is sys.stdout.buffer):
+        # the records get stdout to themselves, so the stream is a valid trace file
+        sys.stdout.flush()
+        write_trace(schedule, out, fmt)
+        return
+    print(f"\n================================================================")
+    print(f"Schedule: {algorithm_name}")
+    print(f"================================================================")
+    sys.stdout.flush()
+
+    write_trace(schedule, out, fmt)
+    print_schedule_footer(schedule)
@@ -0,0 +1,371 @@
+import argparse
+import heapq
+import math
+import random
+import sys
+from bisect import bisect_left, insort
+from fractions import Fraction
+from scheduler_common import *
+
+# Dynamic-slack EDF governors (Pillai & Shin, "Real-Time Dynamic Voltage Scaling
+# for Low-Power Embedded Operating Systems"). Unlike the EE policies, which fix a
+# job's frequency the first time it runs, these re-pick the frequency at every
+# release and completion, so a job can change speed while it runs.
+#
+# Work is counted as a fraction of the job's WCET: the tables are measured per
+# frequency and are not proportional to it, so running dt at frequency f does
+# dt / wcet[f] of the job. Jobs really need actual(job) <= 1 of their WCET.
+# The simulator keeps it exact in integer units, lcm(wcet) per job, so a slice
+# at f is dt * lcm / wcet[f] units; governors get plain floats.
+
+_EPS = 1e-9
+
+def full_execution(job):
+    return 1
+
+def constant_ratio(ratio):
+    # every job runs for the same fraction of its WCET
+    r = Fraction(ratio).limit_denominator(1000)
+    if not 0 < r <= 1:
+        raise ValueError("execution ratio must be in (0, 1]")
+    return lambda job: r
+
+def uniform_ratio(low, high, seed=1):
+    # per-job fraction drawn from [low, high]; a job gets the same value under
+    # every governor, so their energies are comparable
+    if not 0 < low <= high <= 1:
+        raise ValueError("execution ratio range must be within (0, 1]")
+
+    def ratio(job):
+        rng = random.Random(f"{seed}:{job.task_index}:{job.job_number}")
+        return Fraction(rng.uniform(low, high)).limit_denominator(1000)
+    return ratio
+
+def parse_ratio(text, seed=1):
+    # "0.7" for a constant ratio, "0.5:1" for a uniform range
+    if ":" in text:
+        low, high = text.split(":", 1)
+        return uniform_ratio(float(low), float(high), seed)
+    return constant_ratio(float(text))
+
+class StaticEDF:
+    # Slowest frequency at which the worst-case EDF utilization fits, fixed for
+    # the whole run. Base class of the dynamic governors:
+    #   release(job, t)          - job was released
+    #   executed(job, work)      - job ran `work` (fraction of its WCET)
+    #   complete(job, used, t)   - job finished after `used` of its WCET; the last
+    #                              slice is rounded up to a whole time unit and
+    #                              counts as used
+    #   frequency(job, t, ready) - index to run `job` at from t on
+    def __init__(self, config):
+        self.config = config
+        nfreq = len(config.frequencies)
+        self.slowest_first = sorted(range(nfreq), key=lambda f: config.frequencies[f])
+        self.fastest = self.slowest_first[-1]
+        self.rates = [[t.wcet[f] / t.deadline for f in range(nfreq)]
+                      for t in config.tasks[:config.num_tasks]]
+        # worst-case utilization per frequency, every task at its full WCET
+        self.util = [sum(r[f] for r in self.rates) for f in range(nfreq)]
+        self.current = self._pick()
+
+    def _pick(self):
+        for f in self.slowest_first:
+            if self.util[f] <= 1 + _EPS:
+                return f
+        return self.fastest
+
+    def release(self, job, t):
+        pass
+
+    def executed(self, job, work):
+        pass
+
+    def complete(self, job, used, t):
+        pass
+
+    def frequency(self, job, t, ready):
+        return self.current
+
+class MaxFrequencyEDF(StaticEDF):
+    # plain EDF at full speed, the baseline the savings are measured against
+    def frequency(self, job, t, ready):
+        return self.fastest
+
+class GreedyEDF(StaticEDF):
+    # the EE EDF choice (cheapest frequency meeting the deadline), fixed per job
+    def __init__(self, config):
+        StaticEDF.__init__(self, config)
+        get_frequency_table(config)
+
+    def frequency(self, job, t, ready):
+        if job.selected_freq_index is None:
+            return select_frequency_index_ee(self.config, job, t)
+        return job.selected_freq_index
+
+class CycleConservingEDF(StaticEDF):
+    # ccEDF: a task counts at its full WCET from release and at the work it really
+    # used from completion until its next release. The per-frequency utilization
+    # sums are updated in place, so an event costs O(#frequencies). `used` includes
+    # the rounding of the last slice, otherwise the time lost to it is not
+    # reserved and a job can finish a unit late.
+    def __init__(self, config):
+        StaticEDF.__init__(self, config)
+        self.share = [1.0] * config.num_tasks
+
+    def _set_share(self, i, share):
+        delta = share - self.share[i]
+        if delta:
+            rates = self.rates[i]
+            util = self.util
+            for f in range(len(util)):
+                util[f] += delta * rates[f]
+            self.share[i] = share
+            self.current = self._pick()
+
+    def release(self, job, t):
+        self._set_share(job.task_index, 1.0)
+
+    def complete(self, job, used, t):
+        self._set_share(job.task_index, used)
+
+class LookAheadEDF(StaticEDF):
+    # laEDF: defer as much work as possible past the earliest deadline, assuming
+    # worst-case demand from every future release, and run just fast enough for
+    # what must be done before it. Work is reckoned at full speed; the speed check
+    # uses each task's own WCET per frequency. Worst-case work left and the
+    # deadline order are kept up to date per event; the deferral pass itself is
+    # one walk over the tasks, as in the original algorithm.
+    def __init__(self, config):
+        StaticEDF.__init__(self, config)
+        fast = self.fastest
+        tasks = config.tasks[:config.num_tasks]
+        self.full = [t.wcet[fast] for t in tasks]
+        self.fast_rate = [r[fast] for r in self.rates]
+        self.scale = [[w / t.wcet[fast] if t.wcet[fast] else 0.0 for w in t.wcet] for t in tasks]
+        self.total_util = sum(self.fast_rate)
+        self.deadline = [t.deadline for t in tasks]
+        self.by_deadline = sorted((t.deadline, i) for i, t in enumerate(tasks))
+        self.left = [0.0] * config.num_tasks
+
+    def release(self, job, t):
+        i = job.task_index
+        by_deadline = self.by_deadline
+        del by_deadline[bisect_left(by_deadline, (self.deadline[i], i))]
+        self.deadline[i] = job.absolute_deadline
+        insort(by_deadline, (job.absolute_deadline, i))
+        self.left[i] += self.full[i]
+
+    def executed(self, job, work):
+        self.left[job.task_index] -= work * self.full[job.task_index]
+
+    def complete(self, job, used, t):
+        # the unused part of the WCET will not be needed any more
+        i = job.task_index
+        self.left[i] = max(0.0, self.left[i] - (1 - used) * self.full[i])
+
+    def frequency(self, job, t, ready):
+        # latest deadline first: task i may push work into [earliest, D_i] as far
+        # as the capacity left by the later tasks (u) allows, the rest (x) has to
+        # be done before the earliest deadline
+        by_deadline = self.by_deadline
+        if not by_deadline:
+            return self.fastest
+        earliest = by_deadline[0][0]
+        left = self.left
+        scale = self.scale
+        u = self.total_util
+        need = [0.0] * len(self.util)
+        urgent = 0
+        for d, i in reversed(by_deadline):
+            u -= self.fast_rate[i]
+            work = left[i]
+            if work <= _EPS:
+                continue
+            span = d - earliest
+            x = work - (1.0 - u) * span
+            if x > 0:
+                urgent += 1
+                for f, k in enumerate(scale[i]):
+                    need[f] += x * k
+                if span > 0:
+                    u += (work - x) / span
+            else:
+                u += work / span
+
+        # completions are rounded up to whole time units: keep one per job that
+        # has to finish inside the window
+        window = earliest - t - urgent
+        if window <= 0:
+            return self.fastest
+        for f in self.slowest_first:
+            if need[f] <= window + _EPS:
+                return f
+        return self.fastest
+
+GOVERNORS = {
+    "max": MaxFrequencyEDF,
+    "ee": GreedyEDF,
+    "static": StaticEDF,
+    "cc": CycleConservingEDF,
+    "la": LookAheadEDF,
+}
+
+def simulate_dvfs(config, governor, actual=None, jobs=None, pad_to_horizon=False, coalesce=False):
+    # Preemptive EDF (same tie-breaking as schedule_edf: a release only preempts
+    # with a strictly earlier deadline) where governor.frequency() is asked again
+    # at every release and completion. job.remaining_time is the worst-case work
+    # left in units of 1/lcm(wcet); the job completes once it drops to
+    # (1 - actual(job)) * lcm. Slices are whole time units, so a completion is
+    # rounded up to the next one. Idle slices and frequency changes are charged
+    # like in Simulator (sleep states, switch energy).
+    actual = full_execution if actual is None else actual
+    schedule = ScheduleTrace(coalesce)
+    stats = [TaskStats(config.tasks[i].name) for i in range(config.num_tasks)]
+    schedule.task_stats = stats
+    pending = iter_jobs(config) if jobs is None else iter(sorted(jobs, key=lambda j: j.release_time))
+    next_job = next(pending, None)
+    ready = []
+    seq = 0
+    switch = config.switch_energy / 1000.0
+    last = None
+    last_f = None
+    extra = 0.0
+    running = None
+    current_time = 0
+    horizon = config.max_time
+    # per task: work units of a job (lcm of its WCETs), units per time unit at each frequency
+    units = []
+    for t in config.tasks[:config.num_tasks]:
+        total = math.lcm(*t.wcet)
+        units.append((total, [total // w for w in t.wcet]))
+
+    while current_time < horizon:
+        while next_job is not None and next_job.release_time <= current_time:
+            j = next_job
+            j.completed = False
+            j.completion_time = None
+            j.selected_freq_index = None
+            j.remaining_time = units[j.task_index][0]
+            # the job stops at (1 - actual) * units, kept as a numerator over den
+            num, den = actual(j).as_integer_ratio()
+            heapq.heappush(ready, (j.absolute_deadline, j.release_time, j.task_index, seq,
+                                   ((den - num) * j.remaining_time, den), j))
+            seq += 1
+            governor.release(j, current_time)
+            next_job = next(pending, None)
+
+        next_evt = horizon if next_job is None else min(next_job.release_time, horizon)
+        while ready and ready[0][-1].completed:
+            heapq.heappop(ready)
+        if not ready:
+            if next_job is None and not pad_to_horizon:
+                break
+            dt = next_evt - current_time
+            if last == "IDLE" and schedule.end_time() == current_time:
+                duration = schedule.duration[-1] + dt
+                schedule.set_last(duration, idle_energy(config, duration))
+            else:
+                schedule.add(current_time, "IDLE", 0, dt, idle_energy(config, dt))
+            last = "IDLE"
+            current_time += dt
+            continue
+
+        if running is None or ready[0][0] < running[0]:
+            running = ready[0]
+        floor, job = running[-2], running[-1]
+        total, per_unit = units[job.task_index]
+        f = governor.frequency(job, current_time, ready)
+        job.selected_freq_index = f
+        wcet = job.task.wcet[f]
+        # ceil((remaining - floor) * wcet / total) in integers
+        num, den = floor
+        need = -(-(job.remaining_time * den - num) * wcet // (total * den))
+        dt = min(need, next_evt - current_time)
+
+        if dt > 0:
+            power = config.powers[f] / 1000.0
+            if last == (job, f) and schedule.end_time() == current_time:
+                duration = schedule.duration[-1] + dt
+                schedule.set_last(duration, power * duration + extra)
+            else:
+                cost = switch if last_f is not None and f != last_f else 0.0
+                merged = schedule.coalesced
+                schedule.add(current_time, job.task.name, config.frequencies[f], dt,
+                             power * dt + cost)
+                if schedule.coalesced == merged:
+                    # a new entry; one coalesced into the previous keeps its own
+                    extra = cost
+            last = (job, f)
+            last_f = f
+            current_time += dt
+
+        if dt >= need:
+            running = None
+            work = need / wcet
+            governor.executed(job, work)
+            used = 1 - job.remaining_time / total + work
+            job.remaining_time = 0
+            job.completed = True
+            job.completion_time = current_time
+            stats[job.task_index].record(job)
+            if current_time > job.absolute_deadline:
+                schedule.deadline_misses += 1
+            governor.complete(job, used, current_time)
+        else:
+            governor.executed(job, dt / wcet)
+            job.remaining_time -= dt * per_unit[f]
+
+    for item in ready:
+        j = item[-1]
+        if not j.completed and j.absolute_deadline <= horizon:
+            schedule.deadline_misses += 1
+            stats[j.task_index].unfinished += 1
+    return schedule
+
+def schedule_dvfs(config, name, actual=None, jobs=None, coalesce=False, pad_to_horizon=False):
+    if name not in GOVERNORS:
+        raise ValueError(f"unknown governor {name!r}")
+    return simulate_dvfs(config, GOVERNORS[name](config), actual, jobs, pad_to_horizon, coalesce)
+
+def schedule_ccedf(config, actual=None, jobs=None, coalesce=False):
+    return schedule_dvfs(config, "cc", actual, jobs, coalesce)
+
+def schedule_laedf(config, actual=None, jobs=None, coalesce=False):
+    return schedule_dvfs(config, "la", actual, jobs, coalesce)
+
+def main():
+    parser = argparse.ArgumentParser(description="EDF with dynamic slack reclaiming")
+    parser.add_argument("input_file")
+    parser.add_argument("governor", help=", ".join(GOVERNORS) + ", or all for a comparison")
+    parser.add_argument("--ratio", default="1",
+                        help="actual/WCET execution: a constant (0.7) or a range (0.5:1)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--format", choices=TRACE_FORMATS, default="text")
+    args = parser.parse_args()
+
+    governor = args.governor.lower()
+    if governor != "all" and governor not in GOVERNORS:
+        print(f"Error: unknown governor {args.governor!r}")
+        return 1
+    try:
+        actual = parse_ratio(args.ratio, args.seed)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    config = SystemConfig()
+    parse_input(args.input_file, config)
+
+    if governor != "all":
+        schedule = schedule_dvfs(config, governor, actual)
+        print_schedule(schedule, f"{governor.upper()} EDF (ratio {args.ratio})", args.format)
+        return 0
+    # padded to the horizon so every governor is charged for the same span
+    for name in GOVERNORS:
+        schedule = schedule_dvfs(config, name, actual, pad_to_horizon=True)
+        total_energy, idle_time, total_time = schedule_totals(schedule)
+        print(f"{name.upper():<6} ENERGY {total_energy:.3f}J BUSY {int(total_time - idle_time)}s "
+              f"TIME {int(total_time)}s MISSES {schedule.deadline_misses}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
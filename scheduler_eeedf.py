@@ -1,133 +1,149 @@
+import math
 import sys
 from scheduler_common import *
 
+# assignments (nfreq ** tasks) up to this many are searched exactly, larger ones
+# go to the knapsack DP: the search grows with it, 4 P-states x 12 tasks or
+# 16 x 6 stay in milliseconds, 16 x 10 takes a minute
+STATIC_EXACT_LIMIT = 4 ** 12
+STATIC_DP_BUCKETS = 1000
+
 def select_frequency_ee(config, job, current_time):
-    deadline = job.absolute_deadline
-    time_available = deadline - current_time
-    best_freq = config.frequencies[0]  # default to max
-    best_energy = float('inf')
-
-    # try lowest -> highest freq that still meets the deadline
-    for i in range(NUM_FREQUENCIES - 1, -1, -1):
-        wcet = job.task.wcet[i]
-        if wcet <= time_available:
-            power = config.powers[i]
-            energy = (power / 1000.0) * wcet
-            if energy < best_energy:
-                best_energy = energy
-                best_freq = config.frequencies[i]
-    return best_freq
-
-def schedule_eeedf(config, jobs):
-    current_time = 0
-    schedule = []
-
-    # reset job state
-    for job in jobs:
-        job.completed = False
-        job.remaining_time = None
-        job.selected_freq_index = None
-
-    while current_time < config.max_time:
-        # pick earliest-deadline ready job
-        earliest_job = None
-        earliest_deadline = float('inf')
-        for j in jobs:
-            if (not j.completed and
-                j.release_time <= current_time and
-                j.absolute_deadline < earliest_deadline):
-                earliest_deadline = j.absolute_deadline
-                earliest_job = j
-
-        if earliest_job is None:
-            # ---- patched idle branch: DO NOT pad to max_time ----
-            next_release = None
-            for j in jobs:
-                if (not j.completed and
-                    j.release_time > current_time and
-                    j.release_time < config.max_time):
-                    if next_release is None or j.release_time < next_release:
-                        next_release = j.release_time
-
-            if next_release is None:
-                break
-
-            idle_time = next_release - current_time
-            if current_time + idle_time > config.max_time:
-                idle_time = config.max_time - current_time
-
-            if idle_time > 0:
-                entry = ScheduleEntry()
-                entry.start_time = current_time
-                entry.task_name = "IDLE"
-                entry.frequency = 0
-                entry.duration = idle_time
-                entry.energy = (config.idle_power / 1000.0) * idle_time
-                schedule.append(entry)
-                current_time += idle_time
-            else:
-                break
-        else:
-            # choose EE freq (cache per job)
-            if earliest_job.selected_freq_index is None:
-                chosen_freq = select_frequency_ee(config, earliest_job, current_time)
-                idx = 0
-                for i in range(NUM_FREQUENCIES):
-                    if config.frequencies[i] == chosen_freq:
-                        idx = i
-                        break
-                earliest_job.selected_freq_index = idx
-                earliest_job.remaining_time = earliest_job.task.wcet[idx]
-
-            freq_index = earliest_job.selected_freq_index
-            freq = config.frequencies[freq_index]
-
-            # preemption: next earlier-deadline release
-            next_event_time = config.max_time
-            for j in jobs:
-                if (not j.completed and
-                    j.release_time > current_time and
-                    j.release_time < next_event_time and
-                    j.absolute_deadline < earliest_job.absolute_deadline):
-                    next_event_time = j.release_time
-
-            execution_time = min(
-                earliest_job.remaining_time,
-                next_event_time - current_time,
-                config.max_time - current_time
-            )
-
-            if execution_time > 0:
-                power = config.powers[freq_index]
-                energy = (power / 1000.0) * execution_time
-
-                entry = ScheduleEntry()
-                entry.start_time = current_time
-                entry.task_name = earliest_job.task.name
-                entry.frequency = freq
-                entry.duration = execution_time
-                entry.energy = energy
-                schedule.append(entry)
-
-                current_time += execution_time
-                earliest_job.remaining_time -= execution_time
-
-                if earliest_job.remaining_time <= 0:
-                    earliest_job.completed = True
-            else:
-                break
-
-    return schedule
+    return config.frequencies[select_frequency_index_ee(config, job, current_time)]
+
+def eeedf_priority(job):
+    # earliest deadline first, ties keep task order
+    return (job.absolute_deadline,)
+
+def eeedf_preempts(job, running):
+    # preemption: next earlier-deadline release
+    return job.absolute_deadline < running.absolute_deadline
+
+def schedule_eeedf(config, jobs=None, coalesce=False, probe=None, metrics_only=False,
+                   procrastinate=0):
+    # EE freq chosen once per job; the trace is NOT padded to max_time
+    return simulate(config, jobs, eeedf_priority, eeedf_preempts,
+                    select_frequency_index_ee, pad_to_horizon=False, coalesce=coalesce,
+                    probe=probe, metrics_only=metrics_only, procrastinate=procrastinate)
+
+def static_options(config):
+    # per task: (energy rate above idle, utilization, frequency index), cheapest first
+    options = []
+    for i in range(config.num_tasks):
+        t = config.tasks[i]
+        opts = [((config.powers[f] - config.idle_power) / 1000.0 * t.wcet[f] / t.deadline,
+                 t.wcet[f] / t.deadline, f) for f in range(len(config.powers))]
+        opts.sort()
+        options.append(opts)
+    return options
+
+def _static_exact(options):
+    # branch and bound over all assignments, most expensive choices decided first
+    n = len(options)
+    order = sorted(range(n), key=lambda i: options[i][0][0] - options[i][-1][0])
+    min_cost = [0.0] * (n + 1)
+    min_util = [0.0] * (n + 1)
+    for k in range(n - 1, -1, -1):
+        opts = options[order[k]]
+        min_cost[k] = min_cost[k + 1] + opts[0][0]
+        min_util[k] = min_util[k + 1] + min(o[1] for o in opts)
+
+    best_cost = [math.inf]
+    best = [None]
+    choice = [0] * n
+
+    def search(k, cost, util):
+        if cost + min_cost[k] >= best_cost[0] or util + min_util[k] > 1.0 + 1e-9:
+            return
+        if k == n:
+            best_cost[0] = cost
+            best[0] = list(choice)
+            return
+        i = order[k]
+        for c, u, f in options[i]:
+            choice[i] = f
+            search(k + 1, cost + c, util + u)
+
+    search(0, 0.0, 0.0)
+    return best[0]
+
+def _static_dp(options, buckets):
+    # multiple-choice knapsack over utilization rounded UP to 1/buckets, so every
+    # assignment it returns still satisfies U <= 1
+    n = len(options)
+    weights = [[math.ceil(u * buckets - 1e-9) for _, u, _ in opts] for opts in options]
+    dp = [0.0] * (buckets + 1)
+    choices = []
+    for i in range(n):
+        new = [math.inf] * (buckets + 1)
+        chosen = bytearray(buckets + 1)
+        for (c, _, f), w in zip(options[i], weights[i]):
+            for b in range(w, buckets + 1):
+                v = dp[b - w] + c
+                if v < new[b]:
+                    new[b] = v
+                    chosen[b] = f
+        dp = new
+        choices.append(chosen)
+    if dp[buckets] == math.inf:
+        return None
+
+    assignment = [0] * n
+    b = buckets
+    for i in range(n - 1, -1, -1):
+        f = choices[i][b]
+        assignment[i] = f
+        b -= weights[i][[o[2] for o in options[i]].index(f)]
+    return assignment
+
+def solve_static_frequencies(config, exact_limit=STATIC_EXACT_LIMIT, buckets=STATIC_DP_BUCKETS):
+    # Offline per-task frequency assignment minimizing energy per unit time under
+    # the EDF bound sum(wcet_f / T) <= 1 (D == T). Idle power is charged for the
+    # time a task does not use, so slowing down only pays if it beats idling.
+    # Infeasible sets get the lowest-utilization frequency of every task.
+    options = static_options(config)
+    if sum(min(o[1] for o in opts) for opts in options) > 1.0 + 1e-9:
+        return [min(opts, key=lambda o: (o[1], o[2]))[2] for opts in options]
+    if len(config.powers) ** len(options) <= exact_limit:
+        assignment = _static_exact(options)
+    else:
+        assignment = _static_dp(options, buckets)
+    if assignment is None:
+        return [min(opts, key=lambda o: (o[1], o[2]))[2] for opts in options]
+    return assignment
+
+def static_frequency_selector(config, assignment=None):
+    # select_freq callback running every job of a task at its offline frequency
+    if assignment is None:
+        assignment = solve_static_frequencies(config)
+
+    def select_static(config, job, current_time):
+        # tasks added online after solving run at max frequency
+        i = job.task_index
+        return assignment[i] if i < len(assignment) else 0
+    return select_static
+
+def schedule_eeedf_static(config, jobs=None, coalesce=False, assignment=None, probe=None,
+                          metrics_only=False, procrastinate=0):
+    # EDF with the offline assignment fixed per task; like EE EDF, no padding
+    return simulate(config, jobs, eeedf_priority, eeedf_preempts,
+                    static_frequency_selector(config, assignment), pad_to_horizon=False,
+                    coalesce=coalesce, probe=probe, metrics_only=metrics_only,
+                    procrastinate=procrastinate)
 
 def main():
     if len(sys.argv) < 2:
-        print(f"Usage: {sys.argv[0]} <input_file>")
+        print(f"Usage: {sys.argv[0]} <input_file> [static]")
         return 1
     config = SystemConfig()
     parse_input(sys.argv[1], config)
-    jobs = generate_jobs(config)
-    schedule = schedule_eeedf(config, jobs)
-    print_schedule(schedule, "EE EDF")
+    # jobs are streamed so memory does not grow with the horizon
+    if len(sys.argv) > 2 and sys.argv[2].lower() == "static":
+        schedule = schedule_eeedf_static(config)
+        print_schedule(schedule, "Static EE EDF")
+    else:
+        schedule = schedule_eeedf(config)
+        print_schedule(schedule, "EE EDF")
     return 0
 
 if __name__ == "__main__":
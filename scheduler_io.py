@@ -0,0 +1,291 @@
+import contextlib
+import gc
+import json
+import struct
+import sys
+from array import array
+from scheduler_common import *
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Bulk config formats; every loader raises InputError instead of exiting.
+#
+# JSONL: one config per line,
+#   {"max_time": 1000, "powers": [625, 447, 307, 212], "idle_power": 84,
+#    "frequencies": [1188, 918, 648, 384],               (optional, as FREQ)
+#    "tasks": [["w1", 520, [53, 66, 89, 141]], ...]}
+# tasks may also be objects {"name": ..., "deadline": ..., "wcet": [...]}.
+# Optional: "sleep_states": [[name, power, entry, exit, energy], ...] and
+# "switch_energy", as the SLEEP/SWITCH lines of the text format.
+#
+# Binary (.scfg): header, then whole columns, loaded with array.frombytes:
+#   per config   max_time, idle_power, task count, powers (F each)
+#   per task     deadline, wcets (F each)
+#   names        all task names, NUL separated, utf-8
+# Every config of a file shares F and the frequency table; sleep states and
+# switch energy are not stored (saving such configs is refused), neither in .npz.
+#
+# NumPy (.npz, needs numpy): the stacked arrays of configs_from_arrays, i.e.
+# params (configs, tasks, 1 + F) padded with deadline <= 0 rows, powers,
+# idle_power, max_time and frequencies.
+
+CONFIG_MAGIC = b"SCHC"
+CONFIG_VERSION = 1
+CONFIG_HEADER = struct.Struct("<4sHHQQI")   # magic, version, reserved, #configs, #tasks, F
+
+@contextlib.contextmanager
+def _bulk():
+    # while hundreds of thousands of small objects are built the cyclic GC would
+    # rescan them over and over; none of them form cycles
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+def config_from_dict(d, source=None, line=None):
+    try:
+        cfg = SystemConfig()
+        cfg.max_time = int(d["max_time"])
+        cfg.powers = [int(p) for p in d["powers"]]
+        cfg.idle_power = int(d["idle_power"])
+        if "frequencies" in d:
+            cfg.frequencies = [int(f) for f in d["frequencies"]]
+        else:
+            cfg.frequencies = default_frequencies(len(cfg.powers))
+        for t in d["tasks"]:
+            if isinstance(t, dict):
+                cfg.tasks.append(Task(str(t["name"]), int(t["deadline"]), [int(w) for w in t["wcet"]]))
+            else:
+                name, deadline, wcet = t
+                cfg.tasks.append(Task(str(name), int(deadline), [int(w) for w in wcet]))
+        cfg.num_tasks = len(cfg.tasks)
+        for name, power, entry, exit_, energy in d.get("sleep_states", []):
+            cfg.sleep_states.append(SleepState(str(name), int(power), int(entry), int(exit_),
+                                               int(energy)))
+        cfg.switch_energy = int(d.get("switch_energy", 0))
+        check_config(cfg)
+    except KeyError as e:
+        raise InputError(f"missing field {e.args[0]!r}", source, line) from None
+    except (TypeError, ValueError) as e:
+        raise InputError(str(e), source, line) from None
+    return cfg
+
+def config_to_dict(cfg):
+    d = {
+        "max_time": cfg.max_time,
+        "powers": list(cfg.powers),
+        "idle_power": cfg.idle_power,
+        "frequencies": list(cfg.frequencies),
+        "tasks": [[t.name, t.deadline, list(t.wcet)] for t in cfg.tasks[:cfg.num_tasks]],
+    }
+    if cfg.sleep_states:
+        d["sleep_states"] = [[st.name, st.power, st.entry_latency, st.exit_latency, st.energy]
+                             for st in cfg.sleep_states]
+    if cfg.switch_energy:
+        d["switch_energy"] = cfg.switch_energy
+    return d
+
+def _plain_only(configs, fmt):
+    for cfg in configs:
+        if cfg.sleep_states or cfg.switch_energy:
+            raise ValueError(f"{fmt} files do not store sleep states or switch energy; use JSONL")
+
+def iter_jsonl_configs(stream, source=None, on_error=None):
+    # configs of a JSONL stream, one at a time; blank lines are skipped. A bad
+    # line raises InputError, or is passed to on_error(error) and skipped.
+    for n, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            try:
+                d = json.loads(line)
+            except ValueError as e:
+                raise InputError(f"invalid JSON: {e}", source, n) from None
+            if not isinstance(d, dict):
+                raise InputError("expected a JSON object", source, n)
+            yield config_from_dict(d, source, n)
+        except InputError as e:
+            if on_error is None:
+                raise
+            on_error(e)
+
+def load_jsonl(path, on_error=None):
+    with open(path, "r") as f, _bulk():
+        return list(iter_jsonl_configs(f, path, on_error))
+
+def save_jsonl(path, configs):
+    with open(path, "w") as f:
+        for cfg in configs:
+            f.write(json.dumps(config_to_dict(cfg), separators=(",", ":")))
+            f.write("\n")
+
+def save_binary(path, configs):
+    configs = list(configs)
+    nfreq = len(configs[0].frequencies) if configs else 0
+    frequencies = configs[0].frequencies if configs else []
+    max_time, idle_power, counts, powers = array('q'), array('q'), array('q'), array('q')
+    deadlines, wcets = array('q'), array('q')
+    names = []
+    _plain_only(configs, "binary config")
+    for cfg in configs:
+        if list(cfg.frequencies) != list(frequencies):
+            raise ValueError("all configs of a binary file need the same frequency table")
+        max_time.append(cfg.max_time)
+        idle_power.append(cfg.idle_power)
+        counts.append(cfg.num_tasks)
+        powers.extend(cfg.powers)
+        for t in cfg.tasks[:cfg.num_tasks]:
+            deadlines.append(t.deadline)
+            wcets.extend(t.wcet)
+            names.append(t.name)
+    with open(path, "wb") as f:
+        f.write(CONFIG_HEADER.pack(CONFIG_MAGIC, CONFIG_VERSION, 0, len(configs), len(deadlines), nfreq))
+        array('q', frequencies).tofile(f)
+        for col in (max_time, idle_power, counts, powers, deadlines, wcets):
+            col.tofile(f)
+        f.write("\0".join(names).encode("utf-8"))
+
+def load_binary(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < CONFIG_HEADER.size:
+        raise InputError("truncated header", path)
+    magic, version, _, nconf, ntask, nfreq = CONFIG_HEADER.unpack_from(data, 0)
+    if magic != CONFIG_MAGIC or version != CONFIG_VERSION:
+        raise InputError("not a binary config file", path)
+
+    pos = CONFIG_HEADER.size
+    def column(count):
+        nonlocal pos
+        col = array('q')
+        end = pos + count * col.itemsize
+        if end > len(data):
+            raise InputError("truncated data", path)
+        col.frombytes(data[pos:end])
+        pos = end
+        return col
+
+    frequencies = list(column(nfreq))
+    max_time, idle_power, counts = column(nconf), column(nconf), column(nconf)
+    powers = column(nconf * nfreq)
+    deadlines, wcets = column(ntask), column(ntask * nfreq)
+    try:
+        names = data[pos:].decode("utf-8").split("\0") if ntask else []
+    except UnicodeDecodeError:
+        raise InputError("task names are not valid utf-8", path) from None
+    if len(names) != ntask or sum(counts) != ntask:
+        raise InputError("task table does not match the header", path)
+
+    # validated column-wise (the checks of check_config), so building the
+    # configs below is plain object construction
+    if nfreq == 0 or len(set(frequencies)) != nfreq:
+        raise InputError("frequencies must be non-empty and distinct", path)
+    if nconf and min(max_time) < 0:
+        raise InputError(f"config {max_time.index(min(max_time)) + 1}: max_time must not be negative", path)
+    if ntask and min(deadlines) <= 0:
+        k = next(k for k, d in enumerate(deadlines) if d <= 0)
+        raise InputError(f"task {names[k]}: deadline must be positive", path)
+    if ntask and min(wcets) < 0:
+        k = next(k for k, w in enumerate(wcets) if w < 0) // nfreq
+        raise InputError(f"task {names[k]}: WCET must not be negative", path)
+
+    deadlines = deadlines.tolist()
+    flat = wcets.tolist()
+    rows = [flat[k:k + nfreq] for k in range(0, len(flat), nfreq)]
+    flat = powers.tolist()
+    power_rows = [flat[k:k + nfreq] for k in range(0, len(flat), nfreq)]
+    configs = []
+    k = 0
+    with _bulk():
+        for c in range(nconf):
+            cfg = SystemConfig()
+            cfg.max_time = max_time[c]
+            cfg.idle_power = idle_power[c]
+            cfg.frequencies = list(frequencies)
+            cfg.powers = power_rows[c]
+            end = k + counts[c]
+            cfg.tasks = [Task(names[t], deadlines[t], rows[t]) for t in range(k, end)]
+            cfg.num_tasks = counts[c]
+            k = end
+            configs.append(cfg)
+    return configs
+
+def _require_numpy():
+    if np is None:
+        raise InputError(".npz configs need numpy (pip install numpy)")
+
+def save_npz(path, configs):
+    _require_numpy()
+    configs = list(configs)
+    _plain_only(configs, ".npz")
+    nfreq = len(configs[0].frequencies) if configs else 0
+    frequencies = configs[0].frequencies if configs else []
+    width = max((cfg.num_tasks for cfg in configs), default=0)
+    params = np.zeros((len(configs), width, 1 + nfreq), dtype=np.int64)
+    for c, cfg in enumerate(configs):
+        if list(cfg.frequencies) != list(frequencies):
+            raise ValueError("all configs of a .npz file need the same frequency table")
+        for i, t in enumerate(cfg.tasks[:cfg.num_tasks]):
+            params[c, i, 0] = t.deadline
+            params[c, i, 1:] = t.wcet
+    np.savez_compressed(path, params=params,
+                        powers=np.array([cfg.powers for cfg in configs], dtype=np.int64),
+                        idle_power=np.array([cfg.idle_power for cfg in configs], dtype=np.int64),
+                        max_time=np.array([cfg.max_time for cfg in configs], dtype=np.int64),
+                        frequencies=np.array(frequencies, dtype=np.int64))
+
+def load_npz(path):
+    # task names are not stored: tasks come back as w1..wn like configs_from_arrays
+    _require_numpy()
+    from scheduler_batch import configs_from_arrays
+    try:
+        with np.load(path) as z:
+            return configs_from_arrays(z["params"], z["powers"], z["idle_power"], z["max_time"],
+                                       z["frequencies"].tolist())
+    except KeyError as e:
+        raise InputError(f"missing array {e.args[0]!r}", path) from None
+    except ValueError as e:
+        raise InputError(str(e), path) from None
+
+def load_configs(path, on_error=None):
+    # every config in a file, the format picked by extension (text otherwise)
+    if path.endswith(".jsonl"):
+        return load_jsonl(path, on_error)
+    if path.endswith(".scfg"):
+        return load_binary(path)
+    if path.endswith(".npz"):
+        return load_npz(path)
+    with open(path, "r") as f:
+        return [parse_config(f, source=path)]
+
+def main():
+    # convert between formats: scheduler_io.py <in> <out>
+    if len(sys.argv) != 3:
+        print(f"Usage: {sys.argv[0]} <input.(txt|jsonl|scfg|npz)> <output.(jsonl|scfg|npz)>")
+        return 1
+    src, dst = sys.argv[1], sys.argv[2]
+    try:
+        configs = load_configs(src)
+        if dst.endswith(".jsonl"):
+            save_jsonl(dst, configs)
+        elif dst.endswith(".scfg"):
+            save_binary(dst, configs)
+        elif dst.endswith(".npz"):
+            save_npz(dst, configs)
+        else:
+            print(f"Error: unknown output format for {dst}")
+            return 1
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+    print(f"{len(configs)} configs written to {dst}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,285 @@
+import argparse
+import copy
+import heapq
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from scheduler_common import *
+from scheduler import FREQUENCY_STRATEGIES, get_policy, make_scheduler
+
+# per-core feasibility used while packing; other policies fall back to U <= 1
+ADMISSION = {
+    "RM": admit_rm,
+    "EDF": admit_edf,
+}
+
+def core_config(config, task_indices):
+    # a copy of config holding only the given tasks (order kept)
+    sub = copy.copy(config)
+    sub.tasks = [config.tasks[i] for i in task_indices]
+    sub.num_tasks = len(sub.tasks)
+    sub.freq_table = None
+    return sub
+
+def partition_tasks(config, cores, policy="EDF", heuristic="ffd", freqs=0):
+    # Bin-pack tasks onto cores by decreasing utilization (at `freqs`).
+    #   ffd - first core on which the task set stays feasible
+    #   wfd - least loaded core on which it stays feasible
+    # A task that fits nowhere goes to the least loaded core; its index is also
+    # returned in `overflow`. Returns (per-core task index lists, overflow).
+    if cores < 1:
+        raise ValueError("at least one core is required")
+    if heuristic not in ("ffd", "wfd"):
+        raise ValueError(f"unknown heuristic {heuristic!r}")
+    fs = [freqs] * config.num_tasks if isinstance(freqs, int) else list(freqs)
+    util = [config.tasks[i].wcet[fs[i]] / config.tasks[i].deadline for i in range(config.num_tasks)]
+    admit = ADMISSION.get(policy, admit_edf)
+
+    assignment = [[] for _ in range(cores)]
+    load = [0.0] * cores
+    overflow = []
+    for i in sorted(range(config.num_tasks), key=lambda i: (-util[i], i)):
+        candidates = range(cores)
+        if heuristic == "wfd":
+            candidates = sorted(candidates, key=lambda c: (load[c], c))
+        placed = False
+        for c in candidates:
+            trial = sorted(assignment[c] + [i])
+            if admit(core_config(config, trial), [fs[k] for k in trial]):
+                assignment[c] = trial
+                load[c] += util[i]
+                placed = True
+                break
+        if not placed:
+            c = min(range(cores), key=lambda c: (load[c], c))
+            assignment[c] = sorted(assignment[c] + [i])
+            load[c] += util[i]
+            overflow.append(i)
+    return assignment, overflow
+
+def _run_core(args):
+    # only the footers of partitioned cores are printed
+    config, policy, strategy = args
+    return make_scheduler(policy, strategy)(config, metrics_only=True)
+
+def run_partitioned(config, cores, policy="EDF", strategy="MAX", heuristic="ffd", workers=1):
+    # partitioned scheduling: pack, then simulate every core on its own; cores are
+    # independent, so with workers != 1 they run in a process pool
+    get_policy(policy, strategy)
+    assignment, overflow = partition_tasks(config, cores, policy, heuristic)
+    jobs = [(core_config(config, tasks), policy, strategy) for tasks in assignment]
+    if workers == 1:
+        traces = [_run_core(j) for j in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            traces = list(pool.map(_run_core, jobs))
+    return assignment, overflow, traces
+
+def simulate_global(config, cores, priority, preempts, select_freq=max_frequency_index,
+                    pad_to_horizon=True):
+    # Global scheduling: one ready heap shared by all cores. Free cores take the
+    # waiting jobs in priority order; a running job keeps its core until it
+    # completes or a release preempts it (preempts(job, running) as in Simulator),
+    # the release then taking the core of the lowest priority job it preempts.
+    # A job waits while an earlier job of its task is unfinished, so a task never
+    # runs on two cores at once. With one core this is the Simulator schedule.
+    # Returns one ScheduleTrace per core; each trace carries the stats and misses
+    # of the jobs that completed on it. Idle slices and frequency changes are
+    # charged per core like in Simulator (sleep states, switch energy).
+    traces = [ScheduleTrace() for _ in range(cores)]
+    for t in traces:
+        t.task_stats = [TaskStats(config.tasks[i].name) for i in range(config.num_tasks)]
+    if select_freq is not max_frequency_index:
+        get_frequency_table(config)
+
+    pending = iter_jobs(config)
+    next_job = next(pending, None)
+    ready = []
+    seq = 0
+    running = [None] * cores
+    open_jobs = [0] * config.num_tasks   # released and not completed, per task
+    last_freq = [None] * cores
+    extra = [0.0] * cores   # switch energy included in the last running entry per core
+    current_time = 0
+
+    def key(j):
+        return (priority(j), j.task_index, j.job_number)
+
+    def add_idle(c, dt):
+        trace = traces[c]
+        if trace and trace.task_id[-1] < 0 and trace.end_time() == current_time:
+            trace.set_last(trace.duration[-1] + dt, idle_energy(config, trace.duration[-1] + dt))
+        else:
+            trace.add(current_time, "IDLE", 0, dt, idle_energy(config, dt))
+
+    while current_time < config.max_time:
+        released = []
+        while next_job is not None and next_job.release_time <= current_time:
+            heapq.heappush(ready, (priority(next_job), next_job.task_index, next_job.job_number,
+                                   seq, next_job))
+            seq += 1
+            open_jobs[next_job.task_index] += 1
+            released.append(next_job)
+            next_job = next(pending, None)
+
+        # free cores take the waiting jobs in priority order
+        previous = running
+        running = list(previous)
+        busy_tasks = {j.task_index for j in running if j is not None}
+        free = [c for c in range(cores) if running[c] is None]
+        kept = []
+        while free and ready:
+            item = heapq.heappop(ready)
+            j = item[-1]
+            if j.completed:
+                continue
+            kept.append(item)
+            if j.task_index not in busy_tasks:
+                running[free.pop(0)] = j
+                busy_tasks.add(j.task_index)
+        for item in kept:
+            heapq.heappush(ready, item)
+
+        # a release still waiting takes the core of the lowest priority job it
+        # preempts, unless an earlier job of its task is still open
+        for j in sorted(released, key=key):
+            if j.task_index in busy_tasks or open_jobs[j.task_index] > 1:
+                continue
+            victims = [c for c in range(cores) if preempts(j, running[c])]
+            if victims:
+                c = max(victims, key=lambda c: key(running[c]))
+                busy_tasks.discard(running[c].task_index)
+                running[c] = j
+                busy_tasks.add(j.task_index)
+
+        chosen = [j for j in running if j is not None]
+        if not chosen and next_job is None:
+            if pad_to_horizon:
+                for c in range(cores):
+                    add_idle(c, config.max_time - current_time)
+            break
+
+        for j in chosen:
+            if j.selected_freq_index is None:
+                idx = select_freq(config, j, current_time)
+                j.selected_freq_index = idx
+                j.remaining_time = j.task.wcet[idx]
+
+        next_evt = config.max_time
+        if next_job is not None and next_job.release_time < next_evt:
+            next_evt = next_job.release_time
+        dt = next_evt - current_time
+        for j in chosen:
+            dt = min(dt, j.remaining_time)
+        if dt <= 0:
+            break
+
+        for c in range(cores):
+            j = running[c]
+            if j is None:
+                add_idle(c, dt)
+                continue
+            power = config.powers[j.selected_freq_index]
+            trace = traces[c]
+            if previous[c] is j and trace and trace.end_time() == current_time:
+                duration = trace.duration[-1] + dt
+                trace.set_last(duration, (power/1000.0) * duration + extra[c])
+            else:
+                f = j.selected_freq_index
+                extra[c] = 0.0
+                if last_freq[c] is not None and f != last_freq[c]:
+                    extra[c] = config.switch_energy / 1000.0
+                last_freq[c] = f
+                trace.add(current_time, j.task.name, config.frequencies[f], dt,
+                          (power/1000.0) * dt + extra[c])
+
+        current_time += dt
+        for c in range(cores):
+            j = running[c]
+            if j is None:
+                continue
+            j.remaining_time -= dt
+            if j.remaining_time <= 0:
+                j.completed = True
+                j.completion_time = current_time
+                open_jobs[j.task_index] -= 1
+                traces[c].task_stats[j.task_index].record(j)
+                if current_time > j.absolute_deadline:
+                    traces[c].deadline_misses += 1
+                running[c] = None
+
+    for item in ready:
+        j = item[-1]
+        if not j.completed and j.absolute_deadline <= config.max_time:
+            traces[0].deadline_misses += 1
+            traces[0].task_stats[j.task_index].unfinished += 1
+
+    for c in range(cores):
+        trace = traces[c]
+        if pad_to_horizon and trace.end_time() < config.max_time:
+            start = trace.end_time()
+            trace.add(start, "IDLE", 0, config.max_time - start,
+                      idle_energy(config, config.max_time - start))
+    return traces
+
+def run_global(config, cores, policy="EDF", strategy="MAX"):
+    priority, preempts = get_policy(policy, strategy)
+    select_freq, pad_to_horizon, per_config = FREQUENCY_STRATEGIES[strategy]
+    if per_config:
+        select_freq = select_freq(config)
+    return simulate_global(config, cores, priority, preempts, select_freq, pad_to_horizon)
+
+def print_core_footers(traces, core_tasks=None):
+    # core_tasks: task names per core (partitioned mode)
+    grand_energy = 0.0
+    misses = 0
+    for c, trace in enumerate(traces):
+        total_energy, idle_time, total_time = schedule_totals(trace)
+        idle_percent = (idle_time/float(total_time))*100.0 if total_time > 0 else 0.0
+        tasks = ""
+        if core_tasks is not None:
+            tasks = " TASKS " + (",".join(core_tasks[c]) or "-")
+        print(f"CORE {c} ENERGY {total_energy:.3f}J IDLE_PERCENT {idle_percent:.2f}% "
+              f"TIME {int(total_time)}s MISSES {trace.deadline_misses}{tasks}")
+        grand_energy += total_energy
+        misses += trace.deadline_misses
+    print(f"TOTAL_ENERGY {grand_energy:.3f}J")
+    print(f"DEADLINE_MISSES {misses}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Partitioned or global m-core scheduling")
+    parser.add_argument("input_file")
+    parser.add_argument("cores", type=int)
+    parser.add_argument("policy")
+    parser.add_argument("strategy", nargs="?", default="MAX")
+    parser.add_argument("--global", dest="global_mode", action="store_true",
+                        help="shared ready queue instead of partitioning")
+    parser.add_argument("--heuristic", choices=("ffd", "wfd"), default="ffd")
+    parser.add_argument("-j", "--workers", type=int, default=1,
+                        help="processes for simulating partitioned cores")
+    args = parser.parse_args()
+
+    policy = args.policy.upper()
+    strategy = args.strategy.upper()
+    try:
+        get_policy(policy, strategy)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    config = SystemConfig()
+    parse_input(args.input_file, config)
+
+    if args.global_mode:
+        print(f"---- Global {policy} {strategy} on {args.cores} cores for {args.input_file} ----")
+        print_core_footers(run_global(config, args.cores, policy, strategy))
+    else:
+        assignment, overflow, traces = run_partitioned(config, args.cores, policy, strategy,
+                                                       args.heuristic, args.workers)
+        print(f"---- Partitioned ({args.heuristic}) {policy} {strategy} on {args.cores} cores "
+              f"for {args.input_file} ----")
+        if overflow:
+            print("UNPLACED " + ",".join(config.tasks[i].name for i in overflow))
+        print_core_footers(traces, [[config.tasks[i].name for i in tasks] for tasks in assignment])
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+import argparse
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from scheduler_common import *
+from scheduler_batch import SCHEDULERS
+from scheduler_cache import ResultCache, run_cached
+
+def format_entry(entry):
+    if entry.task_name == "IDLE":
+        return f"{entry.start_time} IDLE IDLE {entry.duration} {entry.energy:.3f}J"
+    return f"{entry.start_time} {entry.task_name} {entry.frequency} {entry.duration} {entry.energy:.3f}J"
+
+def run_one(job):
+    # worker: one (input, algorithm) pair -> (input, algorithm, trace lines, footer, error)
+    filename, algorithm, with_trace, cache_dir = job
+    try:
+        with open(filename, "r") as f:
+            cfg = parse_config(f, source=filename)
+    except OSError:
+        return filename, algorithm, None, None, f"cannot load {filename}"
+    except InputError as e:
+        return filename, algorithm, None, None, str(e)
+    if cache_dir is not None:
+        m, sched = run_cached(cfg, algorithm, SCHEDULERS[algorithm], ResultCache(cache_dir), with_trace)
+        footer = (m["total_energy"], m["idle_percent"], m["total_time"], m["deadline_misses"])
+    else:
+        if with_trace:
+            sched = SCHEDULERS[algorithm](cfg)
+        else:
+            sched = simulate_cycles(cfg, SCHEDULERS[algorithm])[4]
+        total_energy, idle_time, total_time = schedule_totals(sched)
+        idle_percent = (idle_time/float(total_time))*100.0 if total_time > 0 else 0.0
+        footer = (total_energy, idle_percent, total_time, sched.deadline_misses)
+    lines = [format_entry(e) for e in sched] if with_trace else None
+    return filename, algorithm, lines, footer, None
+
+def run_matrix(inputs, algorithms, workers=None, chunksize=1, with_trace=False, cache_dir=None):
+    # fan (input, algorithm) pairs out over a process pool; results come back in
+    # input-major, algorithm-minor order whatever the completion order was. With
+    # cache_dir, results are looked up in / stored to a shared ResultCache
+    for algorithm in algorithms:
+        if algorithm not in SCHEDULERS:
+            raise ValueError(f"unknown algorithm {algorithm!r}")
+    pairs = [(filename, algorithm, with_trace, cache_dir)
+             for filename in inputs for algorithm in algorithms]
+    if workers == 1:
+        return [run_one(p) for p in pairs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run_one, pairs, chunksize=chunksize))
+
+def format_report(results):
+    out = []
+    for filename, algorithm, lines, footer, error in results:
+        out.append(f"---- {algorithm} Scheduling for {filename} ----")
+        if error is not None:
+            out.append(f"ERROR {error}")
+            out.append("")
+            continue
+        if lines:
+            out.extend(lines)
+        total_energy, idle_percent, total_time, misses = footer
+        out.append(f"TOTAL_ENERGY {total_energy:.3f}J")
+        out.append(f"IDLE_PERCENT {idle_percent:.2f}%")
+        out.append(f"TOTAL_TIME {int(total_time)}s")
+        out.append(f"DEADLINE_MISSES {misses}")
+        out.append("")
+    return "\n".join(out)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run every (input, algorithm) pair in parallel")
+    parser.add_argument("inputs", nargs="+")
+    parser.add_argument("-a", "--algorithms", default="RM,EDF,EE RM,EE EDF",
+                        help="comma separated subset of: " + ", ".join(SCHEDULERS))
+    parser.add_argument("-j", "--workers", type=int, default=None)
+    parser.add_argument("--chunksize", type=int, default=1)
+    parser.add_argument("--trace", action="store_true", help="include the full schedules")
+    parser.add_argument("--cache", metavar="DIR", help="reuse results cached in DIR")
+    args = parser.parse_args()
+
+    algorithms = [a.strip() for a in args.algorithms.split(",") if a.strip()]
+    results = run_matrix(args.inputs, algorithms, args.workers, args.chunksize, args.trace,
+                         args.cache)
+    print(format_report(results))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
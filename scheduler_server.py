@@ -0,0 +1,285 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from scheduler_common import *
+from scheduler import get_policy, make_scheduler
+from scheduler_io import config_from_dict, config_to_dict, load_configs
+
+# JSONL over a Unix socket or localhost TCP. A request is one line:
+#   {"id": 7, "config": {...scheduler_io JSONL config...}, "policy": "EDF",
+#    "strategy": "EE", "trace": true}
+# and is answered, in request order per connection, by zero or more
+#   {"id": 7, "trace": [[start, task, frequency, duration, energy], ...]}
+# chunks and then {"id": 7, "footer": {...}} or {"id": 7, "error": "..."}.
+#
+# Connections put requests on one bounded queue; when it is full they stop
+# reading, so a flooding client is throttled by the socket itself. A dispatcher
+# groups queued requests into batches (one pool round trip each) and keeps at
+# most `workers` batches in the process pool.
+
+STREAM_LIMIT = 1 << 24
+TRACE_CHUNK = 4096
+
+def run_request(req):
+    # worker: one decoded request -> {"footer": ..., "trace": rows or None} or {"error": ...}
+    try:
+        config = config_from_dict(req.get("config") or {})
+        policy = str(req.get("policy", "EDF")).upper()
+        strategy = str(req.get("strategy", "MAX")).upper()
+        get_policy(policy, strategy)
+    except ValueError as e:
+        return {"error": str(e)}
+    schedule_fn = make_scheduler(policy, strategy)
+    if req.get("trace"):
+        schedule = schedule_fn(config)
+    else:
+        # footer only: one hyperperiod is simulated, the rest extrapolated
+        schedule = simulate_cycles(config, schedule_fn)[4]
+    total_energy, idle_time, total_time = schedule_totals(schedule)
+    footer = {
+        "total_energy": total_energy,
+        "idle_percent": (idle_time/float(total_time))*100.0 if total_time > 0 else 0.0,
+        "total_time": total_time,
+        "deadline_misses": schedule.deadline_misses,
+    }
+    rows = None
+    if req.get("trace"):
+        rows = [[e.start_time, e.task_name, e.frequency, e.duration, e.energy] for e in schedule]
+    return {"footer": footer, "trace": rows}
+
+def run_batch(reqs):
+    return [run_request(r) for r in reqs]
+
+class SchedulerServer:
+    def __init__(self, workers=None, queue_size=64, batch_size=8, batch_delay=0.002):
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.queue = asyncio.Queue(queue_size)
+        self.slots = asyncio.Semaphore(self.workers)
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        self.server = None
+        self._dispatcher = None
+        self._running = set()
+
+    async def start(self, path=None, host="127.0.0.1", port=0):
+        # start the workers before any socket exists: forked children would
+        # otherwise inherit open connections and keep them from closing
+        await asyncio.get_running_loop().run_in_executor(self.executor, run_batch, [])
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self._handle, path, limit=STREAM_LIMIT)
+        else:
+            self.server = await asyncio.start_server(self._handle, host, port, limit=STREAM_LIMIT)
+        self._dispatcher = asyncio.create_task(self._dispatch())
+        return self.server
+
+    def address(self):
+        return self.server.sockets[0].getsockname()
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self._dispatcher.cancel()
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+        self.executor.shutdown()
+
+    async def _handle(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        replies = asyncio.Queue()   # futures in request order
+        sender = asyncio.create_task(self._send(replies, writer))
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                fut = loop.create_future()
+                await replies.put(fut)
+                try:
+                    req = json.loads(line)
+                    if not isinstance(req, dict):
+                        raise ValueError("expected a JSON object")
+                except ValueError as e:
+                    fut.set_result((None, {"error": f"bad request: {e}"}))
+                    continue
+                # blocks while the server is saturated: backpressure on this client
+                await self.queue.put((req, fut))
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            await replies.put(None)
+            await sender
+            writer.close()
+
+    async def _send(self, replies, writer):
+        while True:
+            fut = await replies.get()
+            if fut is None:
+                break
+            rid, result = await fut
+            try:
+                for msg in _responses(rid, result):
+                    writer.write(msg)
+                    await writer.drain()
+            except ConnectionError:
+                pass
+
+    async def _dispatch(self):
+        while True:
+            batch = [await self.queue.get()]
+            if self.queue.qsize() < self.batch_size - 1:
+                # give a burst a moment to fill the batch
+                await asyncio.sleep(self.batch_delay)
+            while len(batch) < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            await self.slots.acquire()
+            task = asyncio.create_task(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch):
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(self.executor, run_batch, [r for r, _ in batch])
+        except Exception as e:
+            results = [{"error": f"worker failed: {e}"}] * len(batch)
+        finally:
+            self.slots.release()
+        for (req, fut), result in zip(batch, results):
+            if not fut.done():
+                fut.set_result((req.get("id"), result))
+
+def _responses(rid, result):
+    def line(obj):
+        return (json.dumps(obj, separators=(",", ":")) + "\n").encode("utf-8")
+    if "error" in result:
+        yield line({"id": rid, "error": result["error"]})
+        return
+    rows = result.get("trace")
+    if rows is not None:
+        for k in range(0, len(rows), TRACE_CHUNK):
+            yield line({"id": rid, "trace": rows[k:k + TRACE_CHUNK]})
+    yield line({"id": rid, "footer": result["footer"]})
+
+async def stream_requests(requests, path=None, host="127.0.0.1", port=None):
+    # client: send requests on one connection while reading the answers; yields
+    # every response line as a dict. Requests without an id get their index.
+    if path is not None:
+        reader, writer = await asyncio.open_unix_connection(path, limit=STREAM_LIMIT)
+    else:
+        reader, writer = await asyncio.open_connection(host, port, limit=STREAM_LIMIT)
+    requests = list(requests)
+
+    async def send():
+        for k, req in enumerate(requests):
+            if "id" not in req:
+                req = dict(req, id=k)
+            writer.write((json.dumps(req, separators=(",", ":")) + "\n").encode("utf-8"))
+            await writer.drain()
+        if writer.can_write_eof():
+            writer.write_eof()
+
+    sender = asyncio.create_task(send())
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            yield json.loads(line)
+    finally:
+        await sender
+        writer.close()
+
+async def submit(requests, path=None, host="127.0.0.1", port=None):
+    # client: {id: {"footer": ..., "trace": rows} or {"error": ...}}
+    results = {}
+    async for msg in stream_requests(requests, path, host, port):
+        entry = results.setdefault(msg["id"], {})
+        if "trace" in msg:
+            entry.setdefault("trace", []).extend(msg["trace"])
+        elif "footer" in msg:
+            entry["footer"] = msg["footer"]
+        else:
+            entry["error"] = msg["error"]
+    return results
+
+def make_request(config, policy="EDF", strategy="MAX", trace=False, rid=None):
+    req = {"config": config_to_dict(config), "policy": policy, "strategy": strategy, "trace": trace}
+    if rid is not None:
+        req["id"] = rid
+    return req
+
+async def serve(args):
+    server = SchedulerServer(args.workers, args.queue, args.batch)
+    await server.start(args.socket, args.host, args.port)
+    where = args.socket if args.socket else "%s:%d" % server.address()[:2]
+    print(f"listening on {where}", flush=True)
+    try:
+        await server.server.serve_forever()
+    finally:
+        await server.close()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+def main():
+    parser = argparse.ArgumentParser(description="Scheduling service over JSONL")
+    sub = parser.add_subparsers(dest="mode", required=True)
+    serve_p = sub.add_parser("serve", help="run the server")
+    submit_p = sub.add_parser("submit", help="send input files to a running server")
+    for p in (serve_p, submit_p):
+        p.add_argument("--socket", help="Unix socket path (default: localhost TCP)")
+        p.add_argument("--host", default="127.0.0.1")
+        p.add_argument("--port", type=int, default=8571)
+    serve_p.add_argument("-j", "--workers", type=int, default=None)
+    serve_p.add_argument("--queue", type=int, default=64, help="bounded request queue size")
+    serve_p.add_argument("--batch", type=int, default=8, help="requests per pool round trip")
+    submit_p.add_argument("inputs", nargs="+", help="input files (any scheduler_io format)")
+    submit_p.add_argument("-p", "--policy", default="EDF")
+    submit_p.add_argument("-s", "--strategy", default="MAX")
+    submit_p.add_argument("--trace", action="store_true")
+    args = parser.parse_args()
+
+    if args.mode == "serve":
+        try:
+            asyncio.run(serve(args))
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    labels = []
+    requests = []
+    for filename in args.inputs:
+        try:
+            configs = load_configs(filename)
+        except (OSError, InputError) as e:
+            print(f"Error: {e}")
+            return 1
+        for k, cfg in enumerate(configs):
+            labels.append(filename if len(configs) == 1 else f"{filename}#{k + 1}")
+            requests.append(make_request(cfg, args.policy, args.strategy, args.trace, len(requests)))
+    results = asyncio.run(submit(requests, args.socket, args.host, args.port))
+    for rid, label in enumerate(labels):
+        r = results.get(rid, {"error": "no response"})
+        print(f"---- {args.policy} {args.strategy} for {label} ----")
+        if "error" in r:
+            print(f"ERROR {r['error']}")
+            continue
+        for start, task, freq, dur, energy in r.get("trace", []):
+            if task == "IDLE":
+                print(f"{start} IDLE IDLE {dur} {energy:.3f}J")
+            else:
+                print(f"{start} {task} {freq} {dur} {energy:.3f}J")
+        f = r["footer"]
+        print(f"TOTAL_ENERGY {f['total_energy']:.3f}J")
+        print(f"IDLE_PERCENT {f['idle_percent']:.2f}%")
+        print(f"TOTAL_TIME {int(f['total_time'])}s")
+        print(f"DEADLINE_MISSES {f['deadline_misses']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
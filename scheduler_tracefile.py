@@ -0,0 +1,180 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+from scheduler_common import *
+
+# sidecar prefix-sum index: magic, record count, then (count + 1) cumulative
+# energies and (count + 1) cumulative idle times, both starting at 0
+INDEX_MAGIC = b"SCHI"
+INDEX_HEADER = struct.Struct("<4sQ")
+_START = struct.Struct("<q")
+
+def index_path(path):
+    return path + ".idx"
+
+def write_binary_trace(schedule, path, frequencies=None, buffer_size=1 << 20):
+    # fixed-width record file (see TraceWriter "binary") plus its prefix-sum index
+    write_trace(schedule, path, "binary", buffer_size, frequencies=frequencies)
+    write_trace_index(schedule, path)
+
+def write_trace_index(schedule, path):
+    energy = array('d', [0.0])
+    idle = array('q', [0])
+    for e in schedule:
+        energy.append(energy[-1] + e.energy)
+        idle.append(idle[-1] + (e.duration if e.task_name == "IDLE" else 0))
+    with open(index_path(path), "wb") as f:
+        f.write(INDEX_HEADER.pack(INDEX_MAGIC, len(energy) - 1))
+        energy.tofile(f)
+        idle.tofile(f)
+
+class TraceFile:
+    # Memory-mapped binary trace. Records are never loaded as a whole: point
+    # queries bisect the start column in the mapping and range queries combine
+    # two lookups in the prefix-sum index, so both are O(log n).
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, num_names, num_freqs = TRACE_HEADER.unpack_from(self._mm, 0)
+        if magic != TRACE_MAGIC or version != TRACE_VERSION:
+            raise ValueError(f"{path}: not a binary schedule trace")
+        pos = TRACE_HEADER.size
+        self.task_names = []
+        for _ in range(num_names):
+            (length,) = struct.unpack_from("<H", self._mm, pos)
+            pos += 2
+            self.task_names.append(self._mm[pos:pos + length].decode("utf-8"))
+            pos += length
+        self.frequencies = list(struct.unpack_from(f"<{num_freqs}q", self._mm, pos))
+        self._offset = pos + 8 * num_freqs
+        self._count = (len(self._mm) - self._offset) // TRACE_RECORD.size
+
+        self._idx_file = None
+        self._idx = None
+        ipath = index_path(path)
+        if os.path.exists(ipath):
+            self._idx_file = open(ipath, "rb")
+            self._idx = mmap.mmap(self._idx_file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, count = INDEX_HEADER.unpack_from(self._idx, 0)
+            if magic != INDEX_MAGIC or count != self._count:
+                raise ValueError(f"{ipath}: index does not match {path}")
+        else:
+            # no sidecar: build the prefix sums once in memory
+            energy = array('d', [0.0])
+            idle = array('q', [0])
+            for k in range(self._count):
+                _, dur, tid, _, e = self._raw(k)
+                energy.append(energy[-1] + e)
+                idle.append(idle[-1] + (dur if tid < 0 else 0))
+            self._energy_prefix = energy
+            self._idle_prefix = idle
+
+    def __len__(self):
+        return self._count
+
+    def _raw(self, k):
+        return TRACE_RECORD.unpack_from(self._mm, self._offset + k * TRACE_RECORD.size)
+
+    def _start(self, k):
+        return _START.unpack_from(self._mm, self._offset + k * TRACE_RECORD.size)[0]
+
+    def _prefix(self, k):
+        if self._idx is None:
+            return self._energy_prefix[k], self._idle_prefix[k]
+        base = INDEX_HEADER.size
+        energy = struct.unpack_from("<d", self._idx, base + 8 * k)[0]
+        idle = struct.unpack_from("<q", self._idx, base + 8 * (self._count + 1) + 8 * k)[0]
+        return energy, idle
+
+    def __getitem__(self, k):
+        if k < 0:
+            k += self._count
+        if not 0 <= k < self._count:
+            raise IndexError(k)
+        start, dur, tid, fidx, energy = self._raw(k)
+        if tid < 0:
+            return ScheduleEntry(start, "IDLE", 0, dur, energy)
+        return ScheduleEntry(start, self.task_names[tid], self.frequencies[fidx], dur, energy)
+
+    def find(self, t):
+        # index of the last record starting at or before t, -1 if none
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._start(mid) <= t:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo - 1
+
+    def entry_at(self, t):
+        # the entry running at time t, or None outside the trace
+        k = self.find(t)
+        if k < 0:
+            return None
+        entry = self[k]
+        return entry if t < entry.start_time + entry.duration else None
+
+    def _cumulative(self, t):
+        # (energy, idle time) consumed in [0, t), entries assumed uniform over their span
+        k = self.find(t)
+        if k < 0:
+            return 0.0, 0
+        start, dur, tid, _, e = self._raw(k)
+        energy, idle = self._prefix(k)
+        part = min(t - start, dur)
+        if dur > 0:
+            energy += e * part / dur
+        if tid < 0:
+            idle += part
+        return energy, idle
+
+    def energy_between(self, t1, t2):
+        return self._cumulative(t2)[0] - self._cumulative(t1)[0]
+
+    def idle_between(self, t1, t2):
+        return self._cumulative(t2)[1] - self._cumulative(t1)[1]
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+        if self._idx is not None:
+            self._idx.close()
+            self._idx_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def main():
+    usage = f"Usage: {sys.argv[0]} <trace.bin> at <t> | energy <t1> <t2> | idle <t1> <t2>"
+    if len(sys.argv) < 4:
+        print(usage)
+        return 1
+    with TraceFile(sys.argv[1]) as trace:
+        query = sys.argv[2]
+        if query == "at":
+            e = trace.entry_at(int(sys.argv[3]))
+            if e is None:
+                print("NONE")
+            elif e.task_name == "IDLE":
+                print(f"{e.start_time} IDLE IDLE {e.duration} {e.energy:.3f}J")
+            else:
+                print(f"{e.start_time} {e.task_name} {e.frequency} {e.duration} {e.energy:.3f}J")
+        elif query in ("energy", "idle") and len(sys.argv) > 4:
+            t1, t2 = int(sys.argv[3]), int(sys.argv[4])
+            if query == "energy":
+                print(f"{trace.energy_between(t1, t2):.3f}J")
+            else:
+                print(f"{trace.idle_between(t1, t2)}s")
+        else:
+            print(usage)
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,34 @@
+import random
+from scheduler_common import *
+from scheduler_bench import random_config
+from scheduler_dvfs import schedule_dvfs, uniform_ratio
+
+# the slack reclaiming governors must keep every EDF-feasible task set feasible
+
+def feasible_configs(count):
+    k = 0
+    while count:
+        rng = random.Random(k)
+        cfg = random_config(rng.randint(1, 10), rng.uniform(0.3, 1.0), rng.randint(200, 1500), rng,
+                            period_range=(3, 30))
+        if sum(t.wcet[0] / t.deadline for t in cfg.tasks) <= 1:
+            yield k, cfg
+            count -= 1
+        k += 1
+
+def test_cc_reserves_rounded_completions():
+    cfg = SystemConfig()
+    cfg.frequencies = [1188, 918, 648, 384]
+    cfg.powers = [625, 447, 307, 212]
+    cfg.idle_power = 84
+    cfg.tasks = [Task("w1", 7, [2, 3, 4, 7]), Task("w2", 4, [1, 2, 2, 4]), Task("w3", 198, [1, 2, 2, 4])]
+    cfg.num_tasks = 3
+    cfg.max_time = 941
+    assert schedule_dvfs(cfg, "cc", uniform_ratio(0.5, 1, 118), pad_to_horizon=True).deadline_misses == 0
+
+def test_no_misses_on_feasible_sets():
+    for k, cfg in feasible_configs(60):
+        for low in (0.1, 0.5, 1.0):
+            for governor in ("max", "static", "cc", "la"):
+                schedule = schedule_dvfs(cfg, governor, uniform_ratio(low, 1, k), pad_to_horizon=True)
+                assert schedule.deadline_misses == 0, (k, low, governor)
@@ -0,0 +1,59 @@
+import random
+from scheduler_common import *
+from scheduler import make_scheduler
+from scheduler_multicore import run_global
+from scheduler_bench import random_config
+
+# global scheduling on one core must reproduce the single-core schedule
+
+PAIRS = [("EDF", "MAX"), ("EDF", "EE"), ("EDF", "STATIC"), ("RM", "MAX"), ("RM", "EE")]
+
+def entries(schedule):
+    return [(e.start_time, e.task_name, e.frequency, e.duration, round(e.energy, 6)) for e in schedule]
+
+def test_one_core_matches_simulator():
+    for k in range(100):
+        rng = random.Random(k)
+        cfg = random_config(rng.randint(1, 6), rng.uniform(0.3, 1.3), rng.randint(50, 1000), rng,
+                            period_range=(5, 60))
+        if k % 2:
+            cfg.switch_energy = rng.randint(1, 50)
+        for policy, strategy in PAIRS:
+            trace = run_global(cfg, 1, policy, strategy)[0]
+            schedule = make_scheduler(policy, strategy)(cfg)
+            assert entries(trace) == entries(schedule), (k, policy, strategy)
+            assert trace.deadline_misses == schedule.deadline_misses
+
+def task_intervals(traces):
+    out = {}
+    for trace in traces:
+        for e in trace:
+            if e.task_name != "IDLE" and e.duration > 0:
+                out.setdefault(e.task_name, []).append((e.start_time, e.start_time + e.duration))
+    return {name: sorted(xs) for name, xs in out.items()}
+
+def test_tasks_run_on_one_core_at_a_time():
+    # jobs of a task run one after the other, each for its WCET (MAX: every job
+    # at frequency 0) and never before its release
+    for k in range(150):
+        rng = random.Random(k)
+        cores = rng.randint(2, 4)
+        cfg = random_config(rng.randint(2, 10), rng.uniform(0.5, cores * 1.1), rng.randint(100, 800), rng,
+                            period_range=(4, 60))
+        for policy, strategy in PAIRS:
+            traces = run_global(cfg, cores, policy, strategy)
+            intervals = task_intervals(traces)
+            for xs in intervals.values():
+                assert all(a[1] <= b[0] for a, b in zip(xs, xs[1:])), (k, cores, policy, strategy)
+            if strategy != "MAX":
+                continue
+            for i, task in enumerate(cfg.tasks):
+                completed = sum(trace.task_stats[i].completed for trace in traces)
+                wcet, busy = task.wcet[0], 0
+                for start, end in intervals.get(task.name, []):
+                    while start < end:
+                        assert start >= (busy // wcet) * task.deadline, (k, task.name)
+                        step = min(wcet - busy % wcet, end - start)
+                        busy += step
+                        start += step
+                assert completed * wcet <= busy < (completed + 1) * wcet, (k, task.name)
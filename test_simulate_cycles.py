@@ -0,0 +1,38 @@
+import random
+from scheduler_common import *
+from scheduler_batch import SCHEDULERS, evaluate
+from scheduler_bench import random_config
+
+# hyperperiod reuse must report what a full-horizon run reports
+
+def full_run(config, algorithm):
+    schedule = SCHEDULERS[algorithm](config)
+    return schedule_totals(schedule) + (schedule.deadline_misses,)
+
+def assert_same(config, algorithm):
+    energy, idle_time, total_time, misses, _ = simulate_cycles(config, SCHEDULERS[algorithm])
+    full_energy, full_idle, full_time, full_misses = full_run(config, algorithm)
+    assert abs(energy - full_energy) < 1e-6, (algorithm, energy, full_energy)
+    assert (idle_time, total_time, misses) == (full_idle, full_time, full_misses)
+
+def test_switch_energy_at_cycle_boundaries():
+    cfg = SystemConfig()
+    cfg.powers = [625, 447, 307, 212]
+    cfg.idle_power = 84
+    cfg.tasks = [Task("a", 10, [2, 3, 5, 9]), Task("b", 20, [9, 11, 14, 19])]
+    cfg.num_tasks = 2
+    cfg.max_time = 40
+    cfg.switch_energy = 1000
+    assert abs(evaluate(cfg, "EE RM")[0] - full_run(cfg, "EE RM")[0]) < 1e-6
+
+def test_random_configs_match_full_runs():
+    for k in range(150):
+        rng = random.Random(k)
+        cfg = random_config(rng.randint(1, 5), rng.uniform(0.2, 0.9), rng.randint(100, 2000), rng,
+                            period_range=(5, 40))
+        if k % 3 == 1:
+            cfg.switch_energy = rng.randint(1, 50)
+        if k % 3 == 2:
+            cfg.sleep_states = [SleepState("light", 40, 1, 1, 30), SleepState("deep", 5, 5, 10, 400)]
+        for algorithm in SCHEDULERS:
+            assert_same(cfg, algorithm)